@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Grading Pipeline Benchmarks
+
+Generates a synthetic cohort and measures wall time, throughput
+(submissions per second) and peak memory of SubmissionChecker,
+SubmissionTester and FeedbackGenerator. Each benchmark runs in a fresh
+process so peak memory (max RSS) is not inflated by earlier runs. Results are saved
+as JSON and can be compared against a saved baseline from another commit.
+
+Example:
+    python benchmarks/bench_grading.py --students 20 --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = BENCHMARK_DIR.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from synthetic_cohort import CohortSpec, generate_cohort  # noqa: E402
+
+
+DEFAULT_RESULTS_DIR = BENCHMARK_DIR / "results"
+BENCHMARKS = ("checker", "checker_batch", "feedback", "tester")
+
+# Relative change in a metric that is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _run_checker(submissions: List[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from check_submission import SubmissionChecker
+    return [SubmissionChecker(path, verbose=False).run_all_checks() for path in submissions]
+
+
+def _run_checker_batch(submissions: List[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from check_submission import check_submission_path
+    from submission_batch import run_batch
+    return run_batch(check_submission_path, [Path(path) for path in submissions], options.get("workers"))
+
+
+def _run_feedback(submissions: List[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from generate_feedback import FeedbackGenerator
+    results = []
+    for path in submissions:
+        generator = FeedbackGenerator()
+        generator.generate_overall_feedback(path)
+        results.append(generator.result)
+    return results
+
+
+def _run_tester(submissions: List[str], options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    from env_cache import EnvironmentCache
+    from test_submission import SubmissionTester
+    env_cache = EnvironmentCache(options["env_dir"])
+    reports = []
+    for path in submissions:
+        tester = SubmissionTester(path, env_cache=env_cache, timeout=options["timeout"])
+        reports.append(tester.run_all_tests())
+    return reports
+
+
+_RUNNERS = {
+    "checker": _run_checker,
+    "checker_batch": _run_checker_batch,
+    "feedback": _run_feedback,
+    "tester": _run_tester
+}
+
+
+def _measure(name: str, submissions: List[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Benchmark worker entry point; runs in its own process."""
+    # Import the tool before timing so module import cost is not counted
+    _RUNNERS[name]([], options)
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = _RUNNERS[name](submissions, options)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    measurement = {
+        "submissions": len(submissions),
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "submissions_per_second": round(len(submissions) / wall, 2) if wall > 0 else None,
+        "peak_rss_kb": _peak_rss_kb(),
+        "passed": sum(1 for result in results if result and result.get("passed", True))
+    }
+
+    if name == "tester":
+        # Imports and __main__ runs happen in sandbox processes, measured separately
+        sandbox_peaks = []
+        for report in results:
+            test_results = report.get("test_results", {})
+            runs = (test_results.get("imports", {}).get("imports", [])
+                    + test_results.get("functionality", {}).get("runs", []))
+            sandbox_peaks.extend(run["peak_rss_kb"] for run in runs if run.get("peak_rss_kb"))
+        measurement["sandbox_peak_rss_kb"] = max(sandbox_peaks, default=None)
+
+    return measurement
+
+
+def _measure_in_child(conn, name: str, submissions: List[str], options: Dict[str, Any]):
+    try:
+        conn.send(_measure(name, submissions, options))
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    conn.close()
+
+
+def run_benchmark(name: str, submissions: List[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one benchmark in a fresh process and return its measurements."""
+    # A plain (non-daemon) process, since the batch runner and the tester's
+    # sandbox start processes of their own
+    context = get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_in_child, args=(child_conn, name, submissions, options))
+    process.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {"error": f"benchmark process exited with code {process.exitcode}"}
+    process.join()
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCHMARK_DIR,
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Relative change of each benchmark's wall time, throughput and peak memory."""
+    changes = []
+    for name, result in current["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_better in (("wall_seconds", False),
+                                         ("submissions_per_second", True),
+                                         ("peak_rss_kb", False)):
+            before, after = previous.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            regressed = change < -REGRESSION_THRESHOLD if higher_is_better else change > REGRESSION_THRESHOLD
+            changes.append({
+                "benchmark": name,
+                "metric": metric,
+                "baseline": before,
+                "current": after,
+                "change": round(change, 3),
+                "regression": regressed
+            })
+    return changes
+
+
+def main():
+    """Main function to run the grading benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark the grading pipeline on a synthetic cohort")
+    parser.add_argument("--students", type=int, default=CohortSpec.students)
+    parser.add_argument("--weeks", type=int, default=CohortSpec.weeks)
+    parser.add_argument("--files", type=int, default=CohortSpec.files_per_submission,
+                        help="Python files per submission")
+    parser.add_argument("--functions", type=int, default=CohortSpec.functions_per_file,
+                        help="Functions per Python file (controls file size)")
+    parser.add_argument("--syntax-error-rate", type=float, default=CohortSpec.syntax_error_rate)
+    parser.add_argument("--heavy-import-rate", type=float, default=CohortSpec.heavy_import_rate)
+    parser.add_argument("--infinite-loop-rate", type=float, default=CohortSpec.infinite_loop_rate)
+    parser.add_argument("--seed", type=int, default=CohortSpec.seed)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--tester-limit", type=int, default=16,
+                        help="Submissions to run through the (much slower) tester (default: 16)")
+    parser.add_argument("--timeout", type=float, default=2.0,
+                        help="Sandbox timeout for the tester, bounds the infinite loops (default: 2s)")
+    parser.add_argument("--workers", "-j", type=int, help="Worker processes for checker_batch")
+    parser.add_argument("--cohort", help="Use (or create) the synthetic cohort in this directory")
+    parser.add_argument("--output", "-o", help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against a saved results file")
+    args = parser.parse_args()
+
+    spec = CohortSpec(
+        students=args.students, weeks=args.weeks, files_per_submission=args.files,
+        functions_per_file=args.functions, syntax_error_rate=args.syntax_error_rate,
+        heavy_import_rate=args.heavy_import_rate, infinite_loop_rate=args.infinite_loop_rate,
+        seed=args.seed
+    )
+
+    with tempfile.TemporaryDirectory(prefix="grading-bench-") as tmp:
+        cohort_root = Path(args.cohort) if args.cohort else Path(tmp) / "student-submissions"
+        if not cohort_root.exists() or not any(cohort_root.iterdir()):
+            start = time.perf_counter()
+            count = generate_cohort(cohort_root, spec)
+            print(f"🏗️  Generated {count} submissions in {time.perf_counter() - start:.2f}s")
+
+        from submission_batch import discover_submissions
+        submissions = [str(path) for path in discover_submissions(str(cohort_root))]
+        options = {
+            "workers": args.workers,
+            "timeout": args.timeout,
+            "env_dir": os.path.join(tmp, "envs")
+        }
+
+        results = {}
+        for name in args.only:
+            paths = submissions[:args.tester_limit] if name == "tester" else submissions
+            print(f"⏱️  {name}: {len(paths)} submissions...")
+            results[name] = run_benchmark(name, paths, options)
+            result = results[name]
+            if "error" in result:
+                print(f"   ❌ {result['error']}")
+                continue
+            print(f"   {result['wall_seconds']}s wall, {result['submissions_per_second']} submissions/s, "
+                  f"peak RSS {result['peak_rss_kb']} KB")
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "cohort": spec.to_dict(),
+        "benchmarks": results
+    }
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report["comparison"] = {"baseline_commit": baseline.get("commit"), "changes": compare(report, baseline)}
+        print(f"\n📊 Compared with {args.compare} ({baseline.get('commit')}):")
+        for change in report["comparison"]["changes"]:
+            flag = "❌" if change["regression"] else "✅"
+            print(f"  {flag} {change['benchmark']} {change['metric']}: "
+                  f"{change['baseline']} → {change['current']} ({change['change']:+.1%})")
+
+    output = args.output
+    if not output:
+        DEFAULT_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = str(DEFAULT_RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit'] or 'unknown'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Benchmark results saved to: {output}")
+
+    regressions = [c for c in report.get("comparison", {}).get("changes", []) if c["regression"]]
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
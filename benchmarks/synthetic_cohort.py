@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Synthetic Cohort Generator
+
+Writes a fake `student-submissions/` tree for benchmarking the grading
+scripts: N students x W weeks, each submission with a README, a
+requirements.txt and a configurable number and size of Python files. A
+seeded share of submissions contain syntax errors, heavy imports, an
+infinite loop in their `__main__` block or a `__main__` block that starts a
+multiprocessing pool, so every code path is exercised.
+"""
+
+import argparse
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+
+@dataclass
+class CohortSpec:
+    """Shape of a synthetic cohort."""
+    students: int = 20
+    weeks: int = 8
+    files_per_submission: int = 3
+    functions_per_file: int = 20
+    syntax_error_rate: float = 0.05
+    heavy_import_rate: float = 0.1
+    infinite_loop_rate: float = 0.02
+    multiprocessing_rate: float = 0.05
+    seed: int = 42
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+HEAVY_IMPORTS = """import asyncio
+import email.mime.multipart
+import http.server
+import unittest
+import xml.etree.ElementTree
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+"""
+
+FUNCTION_TEMPLATE = '''
+
+def {name}(values, threshold={threshold}):
+    """Return the values above threshold, scaled by {scale}."""
+    try:
+        result = []
+        for value in values:
+            if value > threshold:
+                result.append(value * {scale})
+        return result
+    except TypeError as e:
+        print(f"Bad input: {{e}}")
+        return []
+'''
+
+MAIN_BLOCK = """
+
+if __name__ == "__main__":
+    print({name}(list(range(10))))
+"""
+
+INFINITE_LOOP_BLOCK = """
+
+if __name__ == "__main__":
+    while True:
+        pass
+"""
+
+MULTIPROCESSING_BLOCK = """
+
+
+def _square(value):
+    return value * value
+
+
+if __name__ == "__main__":
+    import multiprocessing
+
+    with multiprocessing.Pool(2) as pool:
+        print({name}(pool.map(_square, range(10))))
+"""
+
+SYNTAX_ERROR = """
+
+def broken(values:
+    return values
+"""
+
+
+def _python_file(rng: random.Random, spec: CohortSpec, module: str, is_main: bool,
+                 heavy: bool, syntax_error: bool, infinite_loop: bool,
+                 multiprocessing: bool = False) -> str:
+    parts = [f'"""{module} module for the weekly assignment."""\n']
+    if heavy:
+        parts.append(HEAVY_IMPORTS)
+    names = [f"{module}_step_{i}" for i in range(spec.functions_per_file)]
+    for name in names:
+        parts.append(FUNCTION_TEMPLATE.format(
+            name=name, threshold=rng.randint(0, 5), scale=rng.randint(2, 9)
+        ))
+    if syntax_error:
+        parts.append(SYNTAX_ERROR)
+    if is_main:
+        if infinite_loop:
+            parts.append(INFINITE_LOOP_BLOCK)
+        elif multiprocessing:
+            parts.append(MULTIPROCESSING_BLOCK.format(name=names[0]))
+        else:
+            parts.append(MAIN_BLOCK.format(name=names[0]))
+    return "".join(parts)
+
+
+def generate_cohort(root: Path, spec: CohortSpec) -> int:
+    """Write the cohort under root and return the number of submissions."""
+    rng = random.Random(spec.seed)
+    # Separate stream so adding this case left the other draws unchanged
+    multiprocessing_rng = random.Random(f"{spec.seed}-multiprocessing")
+    count = 0
+
+    for student in range(spec.students):
+        username = f"student{student:04d}"
+        for week in range(1, spec.weeks + 1):
+            submission = root / username / f"week-{week:02d}"
+            submission.mkdir(parents=True, exist_ok=True)
+
+            (submission / "README.md").write_text(
+                f"# Week {week} Assignment\n\nSubmission by {username}.\n", encoding='utf-8'
+            )
+            (submission / "requirements.txt").write_text(
+                "# Standard library only\n", encoding='utf-8'
+            )
+
+            heavy = rng.random() < spec.heavy_import_rate
+            syntax_error = rng.random() < spec.syntax_error_rate
+            infinite_loop = rng.random() < spec.infinite_loop_rate
+            multiprocessing = multiprocessing_rng.random() < spec.multiprocessing_rate
+
+            for index in range(spec.files_per_submission):
+                module = "main" if index == 0 else f"helpers_{index}"
+                source = _python_file(
+                    rng, spec, module,
+                    is_main=index == 0,
+                    heavy=heavy and index == 0,
+                    syntax_error=syntax_error and index == spec.files_per_submission - 1,
+                    infinite_loop=infinite_loop,
+                    multiprocessing=multiprocessing
+                )
+                (submission / f"{module}.py").write_text(source, encoding='utf-8')
+
+            count += 1
+
+    return count
+
+
+def main():
+    """Main function to write a synthetic cohort."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic cohort of submissions")
+    parser.add_argument("root", help="Directory to write the cohort into")
+    parser.add_argument("--students", type=int, default=CohortSpec.students)
+    parser.add_argument("--weeks", type=int, default=CohortSpec.weeks)
+    parser.add_argument("--files", type=int, default=CohortSpec.files_per_submission,
+                        help="Python files per submission")
+    parser.add_argument("--functions", type=int, default=CohortSpec.functions_per_file,
+                        help="Functions per Python file (controls file size)")
+    parser.add_argument("--seed", type=int, default=CohortSpec.seed)
+    args = parser.parse_args()
+
+    spec = CohortSpec(students=args.students, weeks=args.weeks, files_per_submission=args.files,
+                      functions_per_file=args.functions, seed=args.seed)
+    count = generate_cohort(Path(args.root), spec)
+    print(f"✅ Generated {count} submissions in {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,6 @@ import argparse
 import json
 import sys
 from typing import Dict, List, Optional
-from collections import defaultdict
 
 try:
     from github import Github, GithubException
@@ -18,12 +17,20 @@ except ImportError:
     print("Error: PyGithub not installed. Run: pip install PyGithub")
     sys.exit(1)
 
+from github_graphql import GraphQLClient
+from github_http import add_http_cache_arguments, print_cache_stats, setup_http_cache
+from issue_snapshot import IssueRecord, IssueSnapshot
+
 
 class TaskAssigner:
     def __init__(self, token: str, repo_name: str = "NERD-Community-Ethiopia/generative-ai-course"):
-        self.github = Github(token)
+        # 100 issues per page is the API maximum; the default is 30
+        self.github = Github(token, per_page=100)
         self.repo = self.github.get_repo(repo_name)
+        self.repo_name = repo_name
+        self.graphql = GraphQLClient(token)
         self.interns = self._load_interns()
+        self._snapshot: Optional[IssueSnapshot] = None
     
     def _load_interns(self) -> Dict:
         """Load intern information and preferences"""
@@ -54,31 +61,27 @@ class TaskAssigner:
             }
         }
     
-    def get_unassigned_issues(self) -> List:
+    def get_snapshot(self, refresh: bool = False) -> IssueSnapshot:
+        """Open issues, fetched once per run and shared by every method"""
+        if self._snapshot is None or refresh:
+            self._snapshot = self.graphql.fetch_issue_snapshot(self.repo_name)
+        return self._snapshot
+    
+    def get_unassigned_issues(self) -> List[IssueRecord]:
         """Get all unassigned issues"""
-        issues = []
-        for issue in self.repo.get_issues(state='open'):
-            if not issue.assignees and not issue.pull_request:
-                issues.append(issue)
-        return issues
+        return self.get_snapshot().unassigned()
     
     def get_intern_workload(self) -> Dict:
         """Calculate current workload for each intern"""
-        workload = defaultdict(int)
-        
-        for issue in self.repo.get_issues(state='open'):
-            for assignee in issue.assignees:
-                workload[assignee.login] += 1
-        
-        return dict(workload)
+        return self.get_snapshot().workload()
     
-    def calculate_task_score(self, issue, intern: Dict) -> float:
+    def calculate_task_score(self, issue: IssueRecord, intern: Dict) -> float:
         """Calculate how well a task matches an intern's skills and preferences"""
         score = 0.0
         
         # Check skill matches
-        issue_labels = [label.name.lower() for label in issue.labels]
-        issue_body = issue.body.lower() if issue.body else ""
+        issue_labels = [label.lower() for label in issue.labels]
+        issue_body = issue.body.lower()
         
         # Skill matching
         for skill in intern["skills"]:
@@ -123,8 +126,8 @@ class TaskAssigner:
         # Sort issues by priority
         priority_order = ["high-priority", "medium-priority", "low-priority"]
         unassigned_issues.sort(key=lambda issue: 
-            min([priority_order.index(label.name) for label in issue.labels 
-                 if label.name in priority_order] + [len(priority_order)]))
+            min([priority_order.index(label) for label in issue.labels 
+                 if label in priority_order] + [len(priority_order)]))
         
         assignments_made = 0
         
@@ -151,9 +154,11 @@ class TaskAssigner:
             if best_intern and best_score > 0:
                 try:
                     # Assign the issue
-                    issue.add_to_assignees(best_intern["username"])
+                    # Records fetched over GraphQL carry no PyGithub object to write through
+                    self.repo.get_issue(issue.number).add_to_assignees(best_intern["username"])
                     
                     # Update workload
+                    self.get_snapshot().record_assignment(issue, best_intern["username"])
                     best_intern["current_tasks"] += 1
                     assignments_made += 1
                     
@@ -181,7 +186,7 @@ class TaskAssigner:
         
         for issue in unassigned_issues:
             print(f"\nIssue: {issue.title}")
-            print(f"Labels: {[label.name for label in issue.labels]}")
+            print(f"Labels: {issue.labels}")
             
             suggestions = []
             for intern_id, intern in self.interns.items():
@@ -206,8 +211,10 @@ def main():
                        help="Maximum number of assignments to make")
     parser.add_argument("--suggest-only", action="store_true",
                        help="Only suggest assignments, don't make them")
+    add_http_cache_arguments(parser)
     
     args = parser.parse_args()
+    http_cache = setup_http_cache(args)
     
     # Create task assigner
     assigner = TaskAssigner(args.token, args.repo)
@@ -216,6 +223,9 @@ def main():
         assigner.suggest_assignments()
     else:
         assigner.assign_tasks(args.max_assignments)
+    
+    if http_cache:
+        print_cache_stats(http_cache)
 
 
 if __name__ == "__main__":
@@ -7,24 +7,51 @@ This script validates student submissions to ensure they meet the course require
 
 import os
 import sys
-import json
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import argparse
+from functools import partial
+
+from code_analysis import analyze_submission
+from file_walker import is_virtualenv, read_text_limited, walk_files
+from instrumentation import Instrumentation, aggregate_timings, profile_call, profile_path_for, prune_profiles
+from report_rendering import format_for_path, render_report
+from result_cache import DEFAULT_CACHE_DIR, ResultCache
+from result_schema import from_check_report, new_run_id
+from result_store import DEFAULT_STORE_PATH, store_results
+from submission_batch import (
+    changed_submissions, discover_submissions, merge_cohort_report, timed_batch, write_batch_report
+)
+
+
+# Bump whenever a check changes so cached results are invalidated
+CHECKER_VERSION = "3"
+
+# Skipped directories that students should not commit
+DEPENDENCY_DIRS = {"node_modules", ".venv"}
 
 
 class SubmissionChecker:
     """Check student submissions for compliance with course requirements."""
     
-    def __init__(self, submission_path: str):
+    def __init__(self, submission_path: str, verbose: bool = True,
+                 cache: Optional[ResultCache] = None):
         self.submission_path = Path(submission_path)
+        self.verbose = verbose
+        self.cache = cache
+        self.instrumentation = Instrumentation()
         self.errors = []
         self.warnings = []
         self.passed = True
     
+    def log(self, message: str = ""):
+        """Print progress output unless running quietly (e.g. in a batch)."""
+        if self.verbose:
+            print(message)
+    
     def check_directory_structure(self) -> bool:
         """Check if the submission follows the required directory structure."""
-        print("🔍 Checking directory structure...")
+        self.log("🔍 Checking directory structure...")
         
         # Check if submission path exists
         if not self.submission_path.exists():
@@ -48,7 +75,7 @@ class SubmissionChecker:
     
     def check_readme(self) -> bool:
         """Check if README.md meets requirements."""
-        print("📖 Checking README.md...")
+        self.log("📖 Checking README.md...")
         
         readme_path = self.submission_path / "README.md"
         if not readme_path.exists():
@@ -56,8 +83,7 @@ class SubmissionChecker:
             return False
         
         try:
-            with open(readme_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content, _ = read_text_limited(str(readme_path))
             
             # Check for required sections
             required_sections = [
@@ -83,47 +109,45 @@ class SubmissionChecker:
     
     def check_python_code(self) -> bool:
         """Check Python code quality and structure."""
-        print("🐍 Checking Python code...")
+        self.log("🐍 Checking Python code...")
         
-        python_files = list(self.submission_path.glob("*.py"))
-        if not python_files:
+        summaries = analyze_submission(str(self.submission_path))
+        if not summaries:
             return True  # No Python files to check
         
-        for py_file in python_files:
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Basic syntax check
-                try:
-                    compile(content, py_file.name, 'exec')
-                except SyntaxError as e:
-                    self.errors.append(f"Syntax error in {py_file.name}: {e}")
-                    self.passed = False
-                
-                # Check for docstrings
-                if 'def ' in content and '"""' not in content and "'''" not in content:
-                    self.warnings.append(f"Consider adding docstrings to functions in {py_file.name}")
-                
-                # Check for imports
-                if 'import ' not in content and 'from ' not in content:
-                    self.warnings.append(f"No imports found in {py_file.name}")
-                
-            except Exception as e:
-                self.errors.append(f"Error reading {py_file.name}: {e}")
+        for summary in summaries:
+            if summary.read_error:
+                self.errors.append(f"Error reading {summary.name}: {summary.read_error}")
                 self.passed = False
+                continue
+            if summary.too_large:
+                self.warnings.append(summary.too_large_warning)
+                continue
+            
+            # Basic syntax check
+            if summary.syntax_error:
+                self.errors.append(f"Syntax error in {summary.name}: {summary.syntax_error}")
+                self.passed = False
+                continue
+            
+            # Check for docstrings
+            if summary.functions and summary.docstring_count == 0:
+                self.warnings.append(f"Consider adding docstrings to functions in {summary.name}")
+            
+            # Check for imports
+            if not summary.imports:
+                self.warnings.append(f"No imports found in {summary.name}")
         
         return True
     
     def check_requirements(self) -> bool:
         """Check if requirements.txt exists and is valid."""
-        print("📦 Checking requirements.txt...")
+        self.log("📦 Checking requirements.txt...")
         
         req_path = self.submission_path / "requirements.txt"
         if req_path.exists():
             try:
-                with open(req_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content, _ = read_text_limited(str(req_path))
                 
                 # Check if file has content
                 if not content.strip():
@@ -145,25 +169,39 @@ class SubmissionChecker:
     
     def check_file_size(self) -> bool:
         """Check for reasonable file sizes."""
-        print("📏 Checking file sizes...")
+        self.log("📏 Checking file sizes...")
         
         max_size = 10 * 1024 * 1024  # 10MB
         
-        for file_path in self.submission_path.rglob("*"):
-            if file_path.is_file():
-                try:
-                    size = file_path.stat().st_size
-                    if size > max_size:
-                        self.warnings.append(f"Large file detected: {file_path.name} ({size / 1024 / 1024:.1f}MB)")
-                except Exception as e:
-                    self.warnings.append(f"Could not check size of {file_path.name}: {e}")
+        # Walk without descending into .git, caches, virtualenvs or ignored paths
+        skipped = []
+        for entry in walk_files(str(self.submission_path), skipped=skipped):
+            if entry.size > max_size:
+                self.warnings.append(f"Large file detected: {entry.relpath} ({entry.size / 1024 / 1024:.1f}MB)")
+        
+        for relpath in skipped:
+            name = relpath.rsplit("/", 1)[-1]
+            if name in DEPENDENCY_DIRS or is_virtualenv(str(self.submission_path / relpath)):
+                self.warnings.append(f"Dependency directory committed: {relpath} (add it to .gitignore)")
         
         return True
     
     def run_all_checks(self) -> Dict:
         """Run all submission checks."""
-        print(f"🚀 Starting submission check for: {self.submission_path}")
-        print("=" * 50)
+        self.log(f"🚀 Starting submission check for: {self.submission_path}")
+        self.log("=" * 50)
+        
+        cache_key = None
+        if self.cache and self.submission_path.is_dir():
+            with self.instrumentation.stage("cache_lookup"):
+                cache_key = self.cache.key_for(str(self.submission_path))
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.log("♻️  Submission unchanged since last check, using cached result")
+                self.passed = cached["passed"]
+                self.errors = cached["errors"]
+                self.warnings = cached["warnings"]
+                return self.generate_report()
         
         checks = [
             self.check_directory_structure,
@@ -175,11 +213,19 @@ class SubmissionChecker:
         
         for check in checks:
             try:
-                check()
+                with self.instrumentation.stage(check.__name__):
+                    check()
             except Exception as e:
                 self.errors.append(f"Error during {check.__name__}: {e}")
                 self.passed = False
         
+        if cache_key:
+            self.cache.put(cache_key, {
+                "passed": self.passed,
+                "errors": self.errors,
+                "warnings": self.warnings
+            })
+        
         return self.generate_report()
     
     def generate_report(self) -> Dict:
@@ -192,53 +238,169 @@ class SubmissionChecker:
                 "total_errors": len(self.errors),
                 "total_warnings": len(self.warnings),
                 "status": "PASS" if self.passed else "FAIL"
-            }
+            },
+            "timings": self.instrumentation.to_dict()
         }
         
-        print("\n" + "=" * 50)
-        print("📊 SUBMISSION CHECK REPORT")
-        print("=" * 50)
-        
-        if self.passed:
-            print("✅ Submission check PASSED")
-        else:
-            print("❌ Submission check FAILED")
-        
-        if self.errors:
-            print(f"\n❌ Errors ({len(self.errors)}):")
-            for error in self.errors:
-                print(f"  • {error}")
-        
-        if self.warnings:
-            print(f"\n⚠️  Warnings ({len(self.warnings)}):")
-            for warning in self.warnings:
-                print(f"  • {warning}")
-        
-        print(f"\n📈 Summary:")
-        print(f"  • Total Errors: {len(self.errors)}")
-        print(f"  • Total Warnings: {len(self.warnings)}")
-        print(f"  • Status: {report['summary']['status']}")
+        if self.verbose:
+            self.log(render_report("check", report, "text"))
         
         return report
 
 
+def make_cache(cache_dir: Optional[str]) -> Optional[ResultCache]:
+    """Create the checker's result cache, or None when caching is disabled."""
+    if not cache_dir:
+        return None
+    return ResultCache(cache_dir, namespace="check_submission", version=CHECKER_VERSION)
+
+
+def check_submission_path(submission_path: str, cache_dir: Optional[str] = None,
+                          profile_dir: Optional[str] = None) -> Dict:
+    """Check a single submission quietly; used as the batch worker job."""
+    checker = SubmissionChecker(submission_path, verbose=False, cache=make_cache(cache_dir))
+    profile_path = profile_path_for(profile_dir, submission_path) if profile_dir else None
+    report = profile_call(checker.run_all_checks, profile_path=profile_path)
+    report["submission"] = submission_path
+    return report
+
+
+def print_batch_report(batch: Dict):
+    """Print a summary of a batch run."""
+    summary = batch["summary"]
+    print("=" * 50)
+    print("📊 BATCH CHECK REPORT")
+    print("=" * 50)
+    print(f"  • Submissions: {summary['total_submissions']}")
+    print(f"  • Passed: {summary['passed']}")
+    print(f"  • Failed: {summary['failed']}")
+    print(f"  • Elapsed: {summary['elapsed_seconds']}s")
+    
+    stage_totals = aggregate_timings(batch["submissions"])
+    if stage_totals:
+        print("\n⏱️  Time by stage (summed over submissions):")
+        for name, total in stage_totals.items():
+            print(f"  • {name}: {total['wall_seconds']}s wall, {total['cpu_seconds']}s CPU")
+    
+    failed = [r for r in batch["submissions"] if not r.get("passed")]
+    if failed:
+        print(f"\n❌ Failed submissions ({len(failed)}):")
+        for result in failed:
+            print(f"  • {result['submission']} ({len(result.get('errors', []))} errors)")
+
+
 def main():
     """Main function to run the submission checker."""
     parser = argparse.ArgumentParser(description="Check student submission compliance")
-    parser.add_argument("submission_path", help="Path to the submission directory")
-    parser.add_argument("--output", "-o", help="Output file for JSON report")
+    parser.add_argument("submission_path", nargs="?", help="Path to the submission directory")
+    parser.add_argument("--output", "-o", help="Output file for JSON report (.jsonl for one line per submission in batch mode)")
+    parser.add_argument("--batch", metavar="ROOT",
+                        help="Check every <username>/week-XX submission under ROOT")
+    parser.add_argument("--workers", "-j", type=int,
+                        help="Number of worker processes for batch mode (default: CPU count)")
+    parser.add_argument("--since", metavar="BASE",
+                        help="In batch mode, only re-check submissions changed since this commit")
+    parser.add_argument("--head", default="HEAD",
+                        help="Commit to compare against --since (default: HEAD)")
+    parser.add_argument("--cohort-report",
+                        help="Persisted cohort report to merge batch results into")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_STORE_PATH, metavar="PATH",
+                        help=f"Append results to the cohort result store (default path: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--profile-dir",
+                        help="Run under cProfile and keep pstats files for the slowest submissions here")
+    parser.add_argument("--profile-top", type=int, default=5,
+                        help="How many of the slowest submissions' profiles to keep (default: 5)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached results (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-check every submission even if unchanged")
     
     args = parser.parse_args()
+    cache_dir = None if args.no_cache else args.cache_dir
+    run_id = new_run_id()
+    
+    if args.since and not args.batch:
+        parser.error("--since requires --batch")
+    
+    if args.batch:
+        removed = []
+        if args.since:
+            try:
+                submissions, removed = changed_submissions(args.batch, args.since, args.head)
+            except RuntimeError as e:
+                print(f"Error computing changed submissions: {e}")
+                sys.exit(1)
+            print(f"🔀 {len(submissions)} submissions changed, {len(removed)} removed "
+                  f"between {args.since} and {args.head}")
+        else:
+            submissions = discover_submissions(args.batch)
+            if not submissions:
+                print(f"No submissions found under: {args.batch}")
+                sys.exit(1)
+        
+        print(f"🚀 Checking {len(submissions)} submissions under: {args.batch}")
+        batch = timed_batch(partial(check_submission_path, cache_dir=cache_dir, profile_dir=args.profile_dir),
+                            submissions, args.workers)
+        batch["summary"]["stage_totals"] = aggregate_timings(batch["submissions"])
+        print_batch_report(batch)
+        
+        if args.profile_dir:
+            kept = prune_profiles(args.profile_dir, batch["submissions"], args.profile_top)
+            print(f"\n🔬 Profiles of the {len(kept)} slowest submissions in: {args.profile_dir}")
+            for submission, profile in kept.items():
+                print(f"  • {submission}: {profile}")
+        
+        cohort_failed = False
+        if args.cohort_report:
+            try:
+                cohort = merge_cohort_report(args.cohort_report, batch, removed)
+                print(f"\n📚 Cohort report updated: {args.cohort_report} "
+                      f"({cohort['summary']['total_submissions']} submissions, "
+                      f"{cohort['summary']['failed']} failing)")
+            except Exception as e:
+                print(f"Error updating cohort report: {e}")
+                cohort_failed = True
+        
+        if args.store:
+            try:
+                rows = [from_check_report(result, result["submission"], run_id)
+                        for result in batch["submissions"]]
+                count = store_results(args.store, rows)
+                print(f"\n🗄️  Stored {count} results in: {args.store}")
+            except Exception as e:
+                print(f"Error storing results: {e}")
+        
+        if args.output:
+            try:
+                write_batch_report(batch["submissions"], batch["summary"], args.output)
+                print(f"\n📄 Batch report saved to: {args.output}")
+            except Exception as e:
+                print(f"Error saving report: {e}")
+        
+        sys.exit(0 if batch["summary"]["failed"] == 0 and not cohort_failed else 1)
+    
+    if not args.submission_path:
+        parser.error("submission_path is required unless --batch is given")
     
     # Run the checker
-    checker = SubmissionChecker(args.submission_path)
-    report = checker.run_all_checks()
+    checker = SubmissionChecker(args.submission_path, cache=make_cache(cache_dir))
+    profile_path = profile_path_for(args.profile_dir, args.submission_path) if args.profile_dir else None
+    report = profile_call(checker.run_all_checks, profile_path=profile_path)
+    if profile_path:
+        print(f"\n🔬 Profile saved to: {profile_path}")
+    
+    if args.store:
+        try:
+            count = store_results(args.store, [from_check_report(report, args.submission_path, run_id)])
+            print(f"\n🗄️  Stored {count} result in: {args.store}")
+        except Exception as e:
+            print(f"Error storing results: {e}")
     
-    # Save report if output file specified
+    # Save report if output file specified (.md/.html/.txt render the report, anything else is JSON)
     if args.output:
         try:
             with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2)
+                f.write(render_report("check", report, format_for_path(args.output)))
             print(f"\n📄 Report saved to: {args.output}")
         except Exception as e:
             print(f"Error saving report: {e}")
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Shared Code Analysis Engine
+
+Parses each Python file of a submission once with `ast` and extracts a
+compact summary (functions, classes, docstrings, imports, try-blocks and
+LangChain usage) that the checker, tester and feedback generator share.
+`scan_submission` goes one step further and reads every file of a
+submission in a single pass for consumers that need the sources too.
+"""
+
+import ast
+import fnmatch
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from file_walker import MAX_ANALYSIS_BYTES, WalkEntry, read_text_limited, walk_files
+
+
+LANGCHAIN_COMPONENTS = [
+    "LLMChain", "ConversationChain", "PromptTemplate",
+    "OpenAI", "ConversationBufferMemory"
+]
+
+TRY_NODES = (ast.Try,) + ((ast.TryStar,) if hasattr(ast, "TryStar") else ())
+
+# Summaries kept per process; long-lived grading workers analyze an
+# unbounded stream of files, so the caches forget the least recently used
+ANALYSIS_CACHE_ENTRIES = 4096
+
+
+@dataclass
+class FunctionInfo:
+    """A function or method definition."""
+    name: str
+    lineno: int
+    has_docstring: bool
+    try_blocks: int = 0
+
+
+@dataclass
+class ClassInfo:
+    """A class definition."""
+    name: str
+    lineno: int
+    has_docstring: bool
+
+
+@dataclass
+class SyntaxIssue:
+    """A syntax error with its position in the file."""
+    message: str
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+    def __str__(self) -> str:
+        if self.line is None:
+            return self.message
+        if self.column is None:
+            return f"{self.message} (line {self.line})"
+        return f"{self.message} (line {self.line}, column {self.column})"
+
+
+@dataclass
+class FileSummary:
+    """Everything the grading tools need to know about one Python file."""
+    path: str
+    name: str
+    lines: int = 0
+    module_docstring: bool = False
+    functions: List[FunctionInfo] = field(default_factory=list)
+    classes: List[ClassInfo] = field(default_factory=list)
+    imports: List[str] = field(default_factory=list)
+    try_blocks: int = 0
+    langchain_symbols: List[str] = field(default_factory=list)
+    has_main_guard: bool = False
+    has_todos: bool = False
+    syntax_error: Optional[SyntaxIssue] = None
+    read_error: Optional[str] = None
+    # Over the analysis size limit: not read or parsed, but not an error either
+    too_large: bool = False
+
+    @property
+    def too_large_warning(self) -> str:
+        """Warning for a file skipped because of its size."""
+        limit_mb = MAX_ANALYSIS_BYTES / 1024 / 1024
+        return f"{self.name} exceeds the {limit_mb:.0f}MB analysis limit and was not analyzed"
+
+    @property
+    def docstring_count(self) -> int:
+        """Number of modules, classes and functions that have a docstring."""
+        return (
+            int(self.module_docstring) +
+            sum(1 for c in self.classes if c.has_docstring) +
+            sum(1 for f in self.functions if f.has_docstring)
+        )
+
+    @property
+    def documented_functions(self) -> int:
+        """Number of functions that have a docstring."""
+        return sum(1 for f in self.functions if f.has_docstring)
+
+    def error_handling(self) -> Dict[str, Any]:
+        """Try-block counts and the share of functions that handle errors."""
+        guarded = sum(1 for f in self.functions if f.try_blocks)
+        return {
+            "try_blocks": self.try_blocks,
+            "functions": len(self.functions),
+            "functions_with_try": guarded,
+            "coverage": round(guarded / len(self.functions), 2) if self.functions else None
+        }
+
+
+def _is_main_guard(node: ast.stmt) -> bool:
+    """Match `if __name__ == "__main__":` at module level."""
+    if not isinstance(node, ast.If) or not isinstance(node.test, ast.Compare):
+        return False
+    test = node.test
+    if len(test.ops) != 1 or not isinstance(test.ops[0], ast.Eq):
+        return False
+    operands = [test.left] + test.comparators
+    names = [n.id for n in operands if isinstance(n, ast.Name)]
+    constants = [n.value for n in operands if isinstance(n, ast.Constant)]
+    return names == ["__name__"] and constants == ["__main__"]
+
+
+class _SummaryVisitor(ast.NodeVisitor):
+    """Single walk over a module collecting everything for a FileSummary."""
+
+    def __init__(self, summary: FileSummary):
+        self.summary = summary
+        self.function_stack: List[FunctionInfo] = []
+        self.symbols = set()
+
+    def _visit_function(self, node):
+        info = FunctionInfo(node.name, node.lineno, ast.get_docstring(node) is not None)
+        self.summary.functions.append(info)
+        self.function_stack.append(info)
+        self.generic_visit(node)
+        self.function_stack.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        self.summary.classes.append(
+            ClassInfo(node.name, node.lineno, ast.get_docstring(node) is not None)
+        )
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self.summary.imports.append(alias.name)
+            self.symbols.update(alias.name.split("."))
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        self.summary.imports.append(node.module or "." * node.level)
+        for alias in node.names:
+            self.symbols.add(alias.name)
+
+    def visit_Name(self, node: ast.Name):
+        self.symbols.add(node.id)
+
+    def visit_Attribute(self, node: ast.Attribute):
+        self.symbols.add(node.attr)
+        self.generic_visit(node)
+
+    def generic_visit(self, node: ast.AST):
+        if isinstance(node, TRY_NODES):
+            self.summary.try_blocks += 1
+            if self.function_stack:
+                self.function_stack[-1].try_blocks += 1
+        super().generic_visit(node)
+
+
+class _LRUCache:
+    """A size-bounded mapping that evicts its least recently used entry."""
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, FileSummary]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[FileSummary]:
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+            return summary
+
+    def put(self, key, summary: FileSummary):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Summaries of source code seen in this process, keyed by content hash
+_CONTENT_CACHE = _LRUCache()
+
+
+def analyze_source(source: str, path: str) -> FileSummary:
+    """Build the summary for one file's source code.
+
+    Identical source is parsed and compiled only once per process, however
+    many files or submissions it appears in.
+    """
+    name = Path(path).name
+    digest = hashlib.sha256(source.encode('utf-8', 'surrogatepass')).hexdigest()
+    cached = _CONTENT_CACHE.get(digest)
+    if cached is not None:
+        return replace(cached, path=path, name=name)
+
+    summary = FileSummary(path=path, name=name)
+    summary.lines = len(source.split('\n'))
+    summary.has_todos = 'TODO' in source or 'FIXME' in source
+    _CONTENT_CACHE.put(digest, summary)
+
+    try:
+        tree = ast.parse(source, filename=name)
+        # Compiling the tree catches the errors only the compiler reports
+        compile(tree, name, 'exec', dont_inherit=True)
+    except (SyntaxError, ValueError) as e:
+        summary.syntax_error = SyntaxIssue(
+            message=getattr(e, 'msg', None) or str(e),
+            line=getattr(e, 'lineno', None),
+            column=getattr(e, 'offset', None)
+        )
+        return summary
+
+    summary.module_docstring = ast.get_docstring(tree) is not None
+    summary.has_main_guard = any(_is_main_guard(node) for node in tree.body)
+
+    visitor = _SummaryVisitor(summary)
+    visitor.visit(tree)
+    summary.langchain_symbols = [c for c in LANGCHAIN_COMPONENTS if c in visitor.symbols]
+
+    return summary
+
+
+# Summaries computed in this process, keyed by path and file stat
+_SUMMARY_CACHE = _LRUCache()
+
+
+def _read_source(path: Path) -> Tuple[Optional[str], Optional[FileSummary]]:
+    """Return (source, None), or (None, summary) if the file cannot be analyzed."""
+    try:
+        source, truncated = read_text_limited(str(path))
+    except Exception as e:
+        return None, FileSummary(path=str(path), name=path.name, read_error=str(e))
+
+    if truncated:
+        return None, FileSummary(path=str(path), name=path.name, too_large=True)
+    return source, None
+
+
+def analyze_file(path: Path) -> FileSummary:
+    """Read and parse a file, reusing the result if it was already analyzed."""
+    try:
+        stat = path.stat()
+        cache_key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    except OSError as e:
+        return FileSummary(path=str(path), name=path.name, read_error=str(e))
+
+    cached = _SUMMARY_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    source, unreadable = _read_source(path)
+    if source is None:
+        return unreadable
+
+    summary = analyze_source(source, str(path))
+    _SUMMARY_CACHE.put(cache_key, summary)
+    return summary
+
+
+def analyze_submission(submission_path: str) -> List[FileSummary]:
+    """Summaries of the top-level Python files of a submission."""
+    return [analyze_file(py_file) for py_file in sorted(Path(submission_path).glob("*.py"))]
+
+
+@dataclass
+class SubmissionScan:
+    """Everything the analyses need from one walk over a submission."""
+    path: Path
+    files: List[WalkEntry]
+    # Readable Python sources at any depth, keyed by path
+    sources: Dict[str, str]
+    # Summaries of the top-level Python files, as from analyze_submission
+    summaries: List[FileSummary]
+
+    @property
+    def top_level_files(self) -> List[str]:
+        return [entry.relpath for entry in self.files if "/" not in entry.relpath]
+
+    def has_file(self, name: str) -> bool:
+        return name in self.top_level_files
+
+    def matching(self, pattern: str) -> List[str]:
+        """Top-level file names matching a glob pattern."""
+        return [name for name in self.top_level_files if fnmatch.fnmatchcase(name, pattern)]
+
+
+def scan_submission(submission_path: str) -> SubmissionScan:
+    """Walk a submission once, reading and parsing every Python file."""
+    path = Path(submission_path)
+    files = list(walk_files(str(path), use_gitignore=False))
+    sources: Dict[str, str] = {}
+    summaries = []
+
+    for entry in files:
+        if not entry.relpath.endswith(".py"):
+            continue
+        file_path = path / entry.relpath
+        source, unreadable = _read_source(file_path)
+        if source is not None:
+            sources[str(file_path)] = source
+        if "/" not in entry.relpath:
+            if source is None:
+                summaries.append(unreadable)
+            else:
+                summaries.append(analyze_source(source, str(file_path)))
+
+    return SubmissionScan(path=path, files=files, sources=sources, summaries=summaries)
@@ -18,11 +18,16 @@ except ImportError:
     print("Error: PyGithub not installed. Run: pip install PyGithub")
     sys.exit(1)
 
+from github_graphql import GraphQLClient
+from github_http import add_http_cache_arguments, print_cache_stats, setup_http_cache
+
 
 class SprintBoardCreator:
     def __init__(self, token: str, repo_name: str = "NERD-Community-Ethiopia/generative-ai-course"):
         self.github = Github(token)
         self.repo = self.github.get_repo(repo_name)
+        self.repo_name = repo_name
+        self.graphql = GraphQLClient(token)
         self.organization = self.github.get_organization("NERD-Community-Ethiopia")
     
     def create_sprint_board(self, sprint_name: str, start_date: str, end_date: str):
@@ -59,7 +64,8 @@ class SprintBoardCreator:
                 
                 for issue in sprint_issues:
                     try:
-                        backlog_column.create_card(content_id=issue.id, content_type="Issue")
+                        content_type = "PullRequest" if issue.is_pull_request else "Issue"
+                        backlog_column.create_card(content_id=issue.id, content_type=content_type)
                         print(f"Added issue to backlog: {issue.title}")
                     except GithubException as e:
                         print(f"Error adding issue to board: {e}")
@@ -75,14 +81,14 @@ class SprintBoardCreator:
         issues = []
         
         # Look for issues with sprint-related labels or milestones
-        for issue in self.repo.get_issues(state='open'):
+        for issue in self.graphql.fetch_issue_snapshot(self.repo_name).issues:
             # Check labels
-            issue_labels = [label.name.lower() for label in issue.labels]
+            issue_labels = [label.lower() for label in issue.labels]
             
             # Check if issue belongs to this sprint
             if (sprint_name.lower() in issue_labels or
                 sprint_name.lower() in issue.title.lower() or
-                (issue.milestone and sprint_name.lower() in issue.milestone.title.lower())):
+                (issue.milestone and sprint_name.lower() in issue.milestone.lower())):
                 issues.append(issue)
         
         return issues
@@ -139,8 +145,10 @@ def main():
     parser.add_argument("--end-date", help="Sprint end date (YYYY-MM-DD)")
     parser.add_argument("--week", type=int, help="Week number for weekly sprint")
     parser.add_argument("--list-boards", action="store_true", help="List existing boards")
+    add_http_cache_arguments(parser)
     
     args = parser.parse_args()
+    http_cache = setup_http_cache(args)
     
     # Create board creator
     creator = SprintBoardCreator(args.token, args.repo)
@@ -153,6 +161,9 @@ def main():
         creator.create_sprint_board(args.sprint_name, args.start_date, args.end_date)
     else:
         print("Please specify either --week, --sprint-name with dates, or --list-boards")
+    
+    if http_cache:
+        print_cache_stats(http_cache)
 
 
 if __name__ == "__main__":
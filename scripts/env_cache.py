@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Dependency Environment Cache
+
+Builds one isolated site-packages directory per distinct set of normalized
+requirements and shares it between every submission that asks for the same
+packages. Environments can be populated from a local wheelhouse so grading
+works offline, and the least recently used ones are evicted when the cache
+grows past its disk budget. An environment in use holds a shared lock on
+its lock file, so eviction by another worker skips it.
+"""
+
+import hashlib
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+from result_cache import DEFAULT_CACHE_DIR
+
+
+DEFAULT_ENV_DIR = os.path.join(DEFAULT_CACHE_DIR, "envs")
+DEFAULT_WHEELHOUSE = os.getenv("GRADING_WHEELHOUSE")
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024 * 1024  # 5GB
+INSTALL_TIMEOUT = 600
+
+LAST_USED_MARKER = ".last-used"
+SIZE_MARKER = ".size"
+
+NAME_PATTERN = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)(.*)$")
+INCLUDE_PATTERN = re.compile(r"^(-r|--requirement|-c|--constraint)(?:\s*=\s*|\s+)(\S+)$")
+
+
+def _normalize_line(line: str) -> str:
+    """Canonical form of one requirement or option line.
+
+    Only the name and version specifiers lose their whitespace; options
+    (`--index-url URL`, `--hash=...`), URLs and environment markers keep
+    single spaces, which they need to stay valid.
+    """
+    if line.startswith("-"):
+        return " ".join(line.split())
+
+    spec, _, options = line.partition(" --")
+    requirement, _, marker = spec.partition(";")
+    if "@" in requirement:
+        # name @ url: the spaces around @ are part of the syntax
+        requirement = " ".join(requirement.split())
+    else:
+        requirement = re.sub(r"\s+", "", requirement)
+    match = NAME_PATTERN.match(requirement)
+    if match:
+        name, rest = match.groups()
+        requirement = re.sub(r"[-_.]+", "-", name).lower() + rest
+
+    line = requirement
+    if marker.strip():
+        # A space before ";" is required after a URL and allowed elsewhere
+        line += " ; " + " ".join(marker.split())
+    if options.strip():
+        line += " --" + " ".join(options.split())
+    return line
+
+
+def _requirement_lines(text: str) -> List[str]:
+    lines = []
+    for line in text.splitlines():
+        line = line.split(" #", 1)[0].strip()
+        if line and not line.startswith("#"):
+            lines.append(line)
+    return lines
+
+
+def normalize_requirements(text: str) -> List[str]:
+    """Canonical, sorted requirement lines with comments and blanks removed."""
+    return sorted({_normalize_line(line) for line in _requirement_lines(text)})
+
+
+def read_requirements(path: str) -> Tuple[List[str], List[str]]:
+    """Normalized requirements and constraints of a requirements file.
+
+    Files included with -r / -c are read relative to the file that names
+    them and inlined, so the result no longer depends on where the file
+    lives and its hash covers everything pip will see.
+    """
+    requirements: Set[str] = set()
+    constraints: Set[str] = set()
+    seen: Set[str] = set()
+
+    def read(file_path: str, target: Set[str]):
+        file_path = os.path.realpath(file_path)
+        if file_path in seen:
+            return
+        seen.add(file_path)
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        for line in _requirement_lines(text):
+            include = INCLUDE_PATTERN.match(line)
+            if include:
+                option, name = include.groups()
+                included = os.path.join(os.path.dirname(file_path), name)
+                read(included, constraints if option in ("-c", "--constraint") else target)
+            else:
+                target.add(_normalize_line(line))
+
+    read(path, requirements)
+    return sorted(requirements), sorted(constraints)
+
+
+def requirements_key(requirements: List[str], constraints: Sequence[str] = ()) -> str:
+    """Hash of the requirements plus the interpreter they are installed for."""
+    digest = hashlib.sha256()
+    digest.update(f"{sys.implementation.name}-{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    digest.update(f"-{sys.platform}-{platform.machine()}\n".encode())
+    digest.update("\n".join(requirements).encode('utf-8'))
+    if constraints:
+        digest.update(b"\n-- constraints --\n")
+        digest.update("\n".join(constraints).encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def _directory_size(path: Path) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+@dataclass
+class Environment:
+    """A cached set of installed requirements."""
+    key: str
+    path: str
+    site_packages: str
+    reused: bool
+    build_seconds: float = 0.0
+    # Descriptor of the shared lock that keeps the environment from eviction
+    lock_fd: Optional[int] = field(default=None, repr=False, compare=False)
+
+    def release(self):
+        """Let the environment be evicted again once this submission is done."""
+        if self.lock_fd is not None:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+
+class EnvironmentCache:
+    """Content-addressed cache of installed requirement sets."""
+
+    def __init__(self, cache_dir: str = DEFAULT_ENV_DIR, wheelhouse: Optional[str] = DEFAULT_WHEELHOUSE,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir).resolve()
+        self.wheelhouse = wheelhouse
+        self.max_bytes = max_bytes
+
+    def get_or_create(self, requirements_file: str) -> Optional[Environment]:
+        """Return the environment for a requirements file, building it if needed.
+
+        Returns None when the file lists no packages. The environment is
+        locked against eviction until its release() is called.
+        """
+        requirements, constraints = read_requirements(requirements_file)
+        if not requirements:
+            return None
+
+        key = requirements_key(requirements, constraints)
+        env_path = self.cache_dir / key
+        site_packages = env_path / "site-packages"
+
+        lock_fd = self._lock(key)
+        try:
+            if (env_path / SIZE_MARKER).exists():
+                self._touch(env_path)
+                return Environment(key, str(env_path), str(site_packages), reused=True, lock_fd=lock_fd)
+
+            start = time.perf_counter()
+            self._build(env_path, requirements, constraints)
+            self._touch(env_path)
+            build_seconds = time.perf_counter() - start
+        except BaseException:
+            if lock_fd is not None:
+                os.close(lock_fd)
+            raise
+
+        self.evict(keep=key)
+        return Environment(key, str(env_path), str(site_packages), reused=False,
+                           build_seconds=round(build_seconds, 2), lock_fd=lock_fd)
+
+    def _lock_path(self, key: str) -> Path:
+        # Dot-prefixed, so eviction never mistakes it for an environment
+        return self.cache_dir / f".{key}.lock"
+
+    def _lock(self, key: str) -> Optional[int]:
+        """Take a shared lock on an environment; waits while it is being evicted."""
+        if fcntl is None:
+            return None
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self._lock_path(key)), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+        except OSError:
+            os.close(fd)
+            raise
+        return fd
+
+    def _build(self, env_path: Path, requirements: List[str], constraints: Sequence[str] = ()):
+        """Install requirements into a temporary directory, then move it into place."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        build_path = self.cache_dir / f".build-{env_path.name}-{os.getpid()}"
+        shutil.rmtree(build_path, ignore_errors=True)
+        build_path.mkdir()
+
+        try:
+            req_file = build_path / "requirements.txt"
+            lines = list(requirements)
+            if constraints:
+                constraints_file = build_path / "constraints.txt"
+                constraints_file.write_text("\n".join(constraints) + "\n", encoding='utf-8')
+                lines.append(f"-c {constraints_file}")
+            req_file.write_text("\n".join(lines) + "\n", encoding='utf-8')
+
+            command = [
+                sys.executable, "-m", "pip", "install",
+                "--disable-pip-version-check", "--no-input", "--quiet",
+                "--target", str(build_path / "site-packages"),
+                "-r", str(req_file)
+            ]
+            if self.wheelhouse:
+                command += ["--no-index", "--find-links", self.wheelhouse]
+
+            result = subprocess.run(command, capture_output=True, text=True, timeout=INSTALL_TIMEOUT)
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip() or "pip install failed")
+
+            (build_path / SIZE_MARKER).write_text(str(_directory_size(build_path)))
+
+            try:
+                os.rename(build_path, env_path)
+            except OSError:
+                # Another worker finished the same environment first
+                if not (env_path / SIZE_MARKER).exists():
+                    raise
+        finally:
+            shutil.rmtree(build_path, ignore_errors=True)
+
+    def _touch(self, env_path: Path):
+        (env_path / LAST_USED_MARKER).touch()
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove least recently used environments until within the disk budget.
+
+        Environments another submission is using (any process holding their
+        lock) are skipped.
+        """
+        environments = []
+        total_bytes = 0
+        for env_path in self.cache_dir.iterdir():
+            size_marker = env_path / SIZE_MARKER
+            if env_path.name.startswith(".") or not size_marker.exists():
+                continue
+            try:
+                size = int(size_marker.read_text())
+                last_used = (env_path / LAST_USED_MARKER).stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            environments.append((last_used, size, env_path))
+            total_bytes += size
+
+        for _, size, env_path in sorted(environments):
+            if total_bytes <= self.max_bytes:
+                break
+            if env_path.name == keep:
+                continue
+            if not self._remove_unused(env_path):
+                continue
+            total_bytes -= size
+
+    def _remove_unused(self, env_path: Path) -> bool:
+        """Delete an environment unless it is locked by a user."""
+        if fcntl is None:
+            shutil.rmtree(env_path, ignore_errors=True)
+            return True
+        fd = os.open(str(self._lock_path(env_path.name)), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        try:
+            shutil.rmtree(env_path, ignore_errors=True)
+        finally:
+            os.close(fd)
+        return True
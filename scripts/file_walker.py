@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Submission File Walker
+
+A shared, memory-bounded way to look at submission files: an `os.scandir`
+walker that skips version control, caches, virtualenvs and anything the
+submission's .gitignore excludes, and a reader that stops once a file
+exceeds the analysis limit instead of loading it whole.
+"""
+
+import codecs
+import fnmatch
+import os
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+
+# Directories that never contain gradable work. Virtualenvs under other
+# names (venv/, env/) are recognized by is_virtualenv, so a student package
+# that happens to be called env/ is still graded.
+DEFAULT_IGNORE_DIRS = {
+    ".git", "__pycache__", ".pytest_cache", ".mypy_cache", ".ipynb_checkpoints",
+    ".tox", ".nox", "node_modules", ".venv", ".grading-cache"
+}
+
+# Largest text file the analyzers will read
+MAX_ANALYSIS_BYTES = 1024 * 1024  # 1MB
+
+CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class WalkEntry:
+    """A regular file (or, on request, a symlink) found by walk_files."""
+    path: str
+    relpath: str
+    size: int
+    mtime_ns: int
+    is_symlink: bool = False
+
+
+class GitignoreRules:
+    """The common subset of .gitignore syntax, relative to one root.
+
+    Supports plain names, globs, `dir/` patterns, leading-slash anchors and
+    `**`. Negated patterns (`!pattern`) are ignored.
+    """
+
+    def __init__(self, patterns: List[str]):
+        self.rules: List[Tuple[str, bool, bool]] = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith(("#", "!")):
+                continue
+            dir_only = pattern.endswith("/")
+            pattern = pattern.rstrip("/")
+            anchored = "/" in pattern
+            self.rules.append((pattern.lstrip("/"), dir_only, anchored))
+
+    @classmethod
+    def from_directory(cls, root: str) -> "GitignoreRules":
+        """Load root/.gitignore if there is one."""
+        try:
+            with open(os.path.join(root, ".gitignore"), 'r', encoding='utf-8') as f:
+                return cls(f.read().splitlines())
+        except (OSError, UnicodeDecodeError):
+            return cls([])
+
+    def matches(self, relpath: str, is_dir: bool) -> bool:
+        name = relpath.rsplit("/", 1)[-1]
+        for pattern, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                if fnmatch.fnmatchcase(relpath, pattern) or (
+                    pattern.startswith("**/") and fnmatch.fnmatchcase(relpath, pattern[3:])
+                ):
+                    return True
+            elif fnmatch.fnmatchcase(name, pattern):
+                return True
+        return False
+
+
+def is_virtualenv(path: str) -> bool:
+    """Whether a directory is a committed virtual environment."""
+    return os.path.exists(os.path.join(path, "pyvenv.cfg"))
+
+
+def walk_files(root: str, use_gitignore: bool = True,
+               skipped: Optional[List[str]] = None,
+               include_symlinks: bool = False) -> Iterator[WalkEntry]:
+    """Yield every gradable file under root without following symlinks.
+
+    Relative paths of directories that were skipped are appended to
+    `skipped` when a list is given. With include_symlinks, symlinks (to
+    files or directories, or dangling) are yielded as entries of their own
+    instead of being left out; their size is that of the link.
+    """
+    rules = GitignoreRules.from_directory(root) if use_gitignore else GitignoreRules([])
+    stack = [(root, "")]
+
+    while stack:
+        directory, prefix = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            relpath = f"{prefix}{entry.name}"
+            try:
+                if entry.is_symlink():
+                    if include_symlinks and not rules.matches(relpath, False):
+                        stat = entry.stat(follow_symlinks=False)
+                        yield WalkEntry(entry.path, relpath, stat.st_size, stat.st_mtime_ns, is_symlink=True)
+                elif entry.is_dir(follow_symlinks=False):
+                    if (entry.name in DEFAULT_IGNORE_DIRS or rules.matches(relpath, True)
+                            or is_virtualenv(entry.path)):
+                        if skipped is not None:
+                            skipped.append(relpath)
+                        continue
+                    subdirectories.append((entry.path, f"{relpath}/"))
+                elif entry.is_file(follow_symlinks=False):
+                    if rules.matches(relpath, False):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    yield WalkEntry(entry.path, relpath, stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                continue
+
+        # Reverse so directories are visited in sorted order
+        stack.extend(reversed(subdirectories))
+
+
+def read_text_limited(path: str, limit: int = MAX_ANALYSIS_BYTES,
+                      encoding: str = 'utf-8') -> Tuple[str, bool]:
+    """Read at most `limit` bytes of a text file.
+
+    Returns the decoded text and whether the file was truncated. Memory use
+    is bounded by the limit, however large the file is.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    parts = []
+    remaining = limit
+    truncated = False
+
+    with open(path, 'rb') as f:
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            parts.append(decoder.decode(chunk))
+            remaining -= len(chunk)
+        else:
+            truncated = bool(f.read(1))
+
+    if not truncated:
+        parts.append(decoder.decode(b"", final=True))
+    return "".join(parts), truncated
+
@@ -7,23 +7,41 @@ This script analyzes student submissions and generates constructive feedback.
 import os
 import json
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Any
-import subprocess
-import re
+from typing import Dict, List, Any, Optional
+import argparse
+
+from code_analysis import SubmissionScan, scan_submission
+from instrumentation import Instrumentation, profile_call, profile_path_for, prune_profiles
+from report_rendering import format_for_path, render_report
+from result_cache import DEFAULT_CACHE_DIR, ResultCache
+from result_schema import from_feedback_result, new_run_id
+from result_store import DEFAULT_STORE_PATH, store_results
+from style_check import get_style_checker
+from submission_batch import discover_submissions, timed_batch
+
+
+# Bump whenever scoring or wording changes so cached feedback is invalidated
+FEEDBACK_VERSION = "4"
 
 
 class FeedbackGenerator:
     """Generates automated feedback for student submissions."""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[ResultCache] = None):
+        self.cache = cache
         self.feedback = []
         self.score = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.instrumentation = Instrumentation()
         self.max_score = 100
         
-    def analyze_submission_structure(self, submission_path: str) -> Dict[str, Any]:
+    def analyze_submission_structure(self, submission_path: str,
+                                     scan: Optional[SubmissionScan] = None) -> Dict[str, Any]:
         """Analyze the structure of a student submission."""
-        path = Path(submission_path)
+        scan = scan or scan_submission(submission_path)
+        path = scan.path
         analysis = {
             'has_readme': False,
             'has_requirements': False,
@@ -33,7 +51,7 @@ class FeedbackGenerator:
         }
         
         # Check for README
-        if (path / 'README.md').exists():
+        if scan.has_file('README.md'):
             analysis['has_readme'] = True
             analysis['structure_score'] += 20
             analysis['feedback'].append("✅ README.md found")
@@ -41,7 +59,7 @@ class FeedbackGenerator:
             analysis['feedback'].append("❌ Missing README.md")
         
         # Check for requirements.txt
-        if (path / 'requirements.txt').exists():
+        if scan.has_file('requirements.txt'):
             analysis['has_requirements'] = True
             analysis['structure_score'] += 15
             analysis['feedback'].append("✅ requirements.txt found")
@@ -49,7 +67,7 @@ class FeedbackGenerator:
             analysis['feedback'].append("❌ Missing requirements.txt")
         
         # Check for Python files
-        python_files = list(path.glob('*.py'))
+        python_files = scan.matching('*.py')
         if python_files:
             analysis['has_code_files'] = True
             analysis['structure_score'] += 25
@@ -66,49 +84,38 @@ class FeedbackGenerator:
         
         return analysis
     
-    def analyze_code_quality(self, submission_path: str) -> Dict[str, Any]:
+    def analyze_code_quality(self, submission_path: str,
+                             scan: Optional[SubmissionScan] = None) -> Dict[str, Any]:
         """Analyze code quality using various tools."""
-        path = Path(submission_path)
+        scan = scan or scan_submission(submission_path)
         analysis = {
             'quality_score': 0,
             'feedback': [],
-            'issues': []
+            'issues': [],
+            'style_violations': [],
+            'error_handling': {}
         }
         
-        python_files = list(path.glob('*.py'))
-        if not python_files:
+        if not scan.summaries:
             return analysis
         
-        # Run flake8 for code style
+        # Check code style (flake8's E/W checks, run in-process on the scanned sources)
         try:
-            result = subprocess.run(
-                ['flake8', str(path), '--count', '--select=E,W', '--max-line-length=88'],
-                capture_output=True, text=True, timeout=30
-            )
-            if result.returncode == 0:
+            violations = get_style_checker().check_sources(scan.sources)
+            analysis['style_violations'] = [violation.to_dict() for violation in violations]
+            if not violations:
                 analysis['quality_score'] += 20
                 analysis['feedback'].append("✅ Code follows PEP 8 style guidelines")
             else:
-                issues = result.stdout.strip().split('\n') if result.stdout else []
-                analysis['issues'].extend(issues[:5])  # Show first 5 issues
-                analysis['feedback'].append(f"⚠️ Found {len(issues)} style issues (showing first 5)")
+                analysis['issues'].extend(str(violation) for violation in violations[:5])  # Show first 5 issues
+                analysis['feedback'].append(f"⚠️ Found {len(violations)} style issues (showing first 5)")
         except Exception as e:
             analysis['feedback'].append(f"⚠️ Could not run style check: {e}")
         
         # Check for docstrings
-        docstring_count = 0
-        function_count = 0
-        for py_file in python_files:
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Simple regex to count functions and docstrings
-                    functions = re.findall(r'def\s+\w+', content)
-                    docstrings = re.findall(r'""".*?"""', content, re.DOTALL)
-                    function_count += len(functions)
-                    docstring_count += len(docstrings)
-            except Exception:
-                continue
+        summaries = scan.summaries
+        function_count = sum(len(summary.functions) for summary in summaries)
+        docstring_count = sum(summary.documented_functions for summary in summaries)
         
         if function_count > 0:
             docstring_ratio = docstring_count / function_count
@@ -118,25 +125,24 @@ class FeedbackGenerator:
             else:
                 analysis['feedback'].append("⚠️ Consider adding more docstrings to functions")
         
-        # Check for error handling
-        try:
-            result = subprocess.run(
-                ['grep', '-r', 'try:', str(path)],
-                capture_output=True, text=True
-            )
-            if result.returncode == 0:
-                analysis['quality_score'] += 10
-                analysis['feedback'].append("✅ Error handling found in code")
-            else:
-                analysis['feedback'].append("⚠️ Consider adding error handling")
-        except Exception:
-            analysis['feedback'].append("⚠️ Could not check for error handling")
+        # Check for error handling (try blocks in parsed code, per file)
+        analysis['error_handling'] = {
+            summary.name: summary.error_handling()
+            for summary in summaries
+            if summary.read_error is None and not summary.too_large and summary.syntax_error is None
+        }
+        if any(stats['try_blocks'] for stats in analysis['error_handling'].values()):
+            analysis['quality_score'] += 10
+            analysis['feedback'].append("✅ Error handling found in code")
+        else:
+            analysis['feedback'].append("⚠️ Consider adding error handling")
         
         return analysis
     
-    def analyze_functionality(self, submission_path: str) -> Dict[str, Any]:
+    def analyze_functionality(self, submission_path: str,
+                              scan: Optional[SubmissionScan] = None) -> Dict[str, Any]:
         """Analyze if the code is functional."""
-        path = Path(submission_path)
+        scan = scan or scan_submission(submission_path)
         analysis = {
             'functionality_score': 0,
             'feedback': [],
@@ -144,24 +150,20 @@ class FeedbackGenerator:
             'tests_total': 0
         }
         
-        # Check if code runs without syntax errors
-        python_files = list(path.glob('*.py'))
-        for py_file in python_files:
-            try:
-                result = subprocess.run(
-                    [sys.executable, '-m', 'py_compile', str(py_file)],
-                    capture_output=True, text=True, timeout=10
-                )
-                if result.returncode == 0:
-                    analysis['functionality_score'] += 10
-                    analysis['feedback'].append(f"✅ {py_file.name} has valid Python syntax")
-                else:
-                    analysis['feedback'].append(f"❌ {py_file.name} has syntax errors")
-            except Exception as e:
-                analysis['feedback'].append(f"⚠️ Could not check {py_file.name}: {e}")
+        # Check if code compiles without syntax errors
+        for summary in scan.summaries:
+            if summary.read_error:
+                analysis['feedback'].append(f"⚠️ Could not check {summary.name}: {summary.read_error}")
+            elif summary.too_large:
+                analysis['feedback'].append(f"⚠️ {summary.too_large_warning}")
+            elif summary.syntax_error:
+                analysis['feedback'].append(f"❌ {summary.name} has syntax errors: {summary.syntax_error}")
+            else:
+                analysis['functionality_score'] += 10
+                analysis['feedback'].append(f"✅ {summary.name} has valid Python syntax")
         
         # Check for test files
-        test_files = list(path.glob('*test*.py')) + list(path.glob('test_*.py'))
+        test_files = scan.matching('*test*.py') + scan.matching('test_*.py')
         if test_files:
             analysis['feedback'].append(f"✅ Found {len(test_files)} test file(s)")
             analysis['functionality_score'] += 10
@@ -170,11 +172,19 @@ class FeedbackGenerator:
         
         return analysis
     
-    def generate_overall_feedback(self, submission_path: str) -> str:
-        """Generate comprehensive feedback for a submission."""
-        structure_analysis = self.analyze_submission_structure(submission_path)
-        quality_analysis = self.analyze_code_quality(submission_path)
-        functionality_analysis = self.analyze_functionality(submission_path)
+    def build_feedback_result(self, submission_path: str) -> Dict[str, Any]:
+        """Run every analysis and collect the scores and recommendations."""
+        stage = self.instrumentation.stage
+        
+        # Walk and parse the submission once; every analysis reads from the scan
+        with stage("scan_submission"):
+            scan = scan_submission(submission_path)
+        with stage("analyze_submission_structure"):
+            structure_analysis = self.analyze_submission_structure(submission_path, scan)
+        with stage("analyze_code_quality"):
+            quality_analysis = self.analyze_code_quality(submission_path, scan)
+        with stage("analyze_functionality"):
+            functionality_analysis = self.analyze_functionality(submission_path, scan)
         
         total_score = (
             structure_analysis['structure_score'] +
@@ -182,81 +192,57 @@ class FeedbackGenerator:
             functionality_analysis['functionality_score']
         )
         
-        feedback_md = f"""# Automated Feedback Report
-
-## 📊 Overall Score: {total_score}/100
-
-### 📁 Structure Analysis ({structure_analysis['structure_score']}/70)
-{chr(10).join(structure_analysis['feedback'])}
-
-### 🎯 Code Quality ({quality_analysis['quality_score']}/45)
-{chr(10).join(quality_analysis['feedback'])}
-
-### ⚙️ Functionality ({functionality_analysis['functionality_score']}/20)
-{chr(10).join(functionality_analysis['feedback'])}
-
-## 🏆 Grade Breakdown
-- **Structure**: {structure_analysis['structure_score']}/70 points
-- **Code Quality**: {quality_analysis['quality_score']}/45 points  
-- **Functionality**: {functionality_analysis['functionality_score']}/20 points
-- **Total**: {total_score}/135 points (scaled to 100)
-
-## 📝 Recommendations
-
-### What you did well:
-"""
-        
-        # Add positive feedback
+        # Positive feedback
         positive_points = []
         if structure_analysis['has_readme']:
-            positive_points.append("- Good documentation with README.md")
+            positive_points.append("Good documentation with README.md")
         if structure_analysis['has_requirements']:
-            positive_points.append("- Proper dependency management")
+            positive_points.append("Proper dependency management")
         if quality_analysis['quality_score'] > 20:
-            positive_points.append("- Code follows good style practices")
+            positive_points.append("Code follows good style practices")
         if functionality_analysis['functionality_score'] > 10:
-            positive_points.append("- Code is syntactically correct")
+            positive_points.append("Code is syntactically correct")
         
-        if positive_points:
-            feedback_md += "\n".join(positive_points)
-        else:
-            feedback_md += "- Keep working on the basics!"
-        
-        feedback_md += "\n\n### Areas for improvement:\n"
-        
-        # Add improvement suggestions
+        # Improvement suggestions
         improvements = []
         if not structure_analysis['has_readme']:
-            improvements.append("- Add a comprehensive README.md file")
+            improvements.append("Add a comprehensive README.md file")
         if not structure_analysis['has_requirements']:
-            improvements.append("- Include a requirements.txt file")
+            improvements.append("Include a requirements.txt file")
         if quality_analysis['quality_score'] < 20:
-            improvements.append("- Improve code style and formatting")
+            improvements.append("Improve code style and formatting")
         if not functionality_analysis['functionality_score']:
-            improvements.append("- Fix syntax errors in your code")
-        
-        if improvements:
-            feedback_md += "\n".join(improvements)
-        else:
-            feedback_md += "- Great job! Keep up the excellent work!"
-        
-        feedback_md += f"""
-
-## 🔍 Detailed Issues
-"""
+            improvements.append("Fix syntax errors in your code")
         
-        if quality_analysis['issues']:
-            feedback_md += "\n".join([f"- {issue}" for issue in quality_analysis['issues']])
-        else:
-            feedback_md += "- No major issues found!"
+        return {
+            'total_score': total_score,
+            'structure': structure_analysis,
+            'quality': quality_analysis,
+            'functionality': functionality_analysis,
+            'positive_points': positive_points,
+            'improvements': improvements
+        }
+    
+    def generate_overall_feedback(self, submission_path: str, fmt: str = "markdown") -> str:
+        """Generate comprehensive feedback for a submission."""
+        self.instrumentation = Instrumentation()
+        result = None
+        cache_key = None
+        if self.cache and Path(submission_path).is_dir():
+            with self.instrumentation.stage("cache_lookup"):
+                cache_key = self.cache.key_for(submission_path)
+                result = self.cache.get(cache_key)
         
-        feedback_md += """
-
----
-*This feedback was generated automatically. Please review and address the suggestions above.*
-"""
+        if result is None:
+            result = self.build_feedback_result(submission_path)
+            if cache_key:
+                self.cache.put(cache_key, result)
         
-        return feedback_md
+        # Timings describe this run only, so they are not cached
+        result = dict(result, timings=self.instrumentation.to_dict())
+        self.result = result
+        self.score = result['total_score']
+        return render_report("feedback", result, fmt)
     
     def save_feedback(self, feedback: str, output_file: str = 'feedback.md'):
         """Save feedback to a file."""
@@ -265,20 +251,133 @@ class FeedbackGenerator:
         print(f"Feedback saved to {output_file}")
 
 
+def generate_feedback_file(submission_path: str, output_path: str, cache_dir: Optional[str] = None,
+                           fmt: str = "markdown", profile_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Generate and save feedback for one submission; used as the batch worker job."""
+    cache = None
+    if cache_dir:
+        cache = ResultCache(cache_dir, namespace="generate_feedback", version=FEEDBACK_VERSION)
+    
+    generator = FeedbackGenerator(cache=cache)
+    profile_path = profile_path_for(profile_dir, submission_path) if profile_dir else None
+    feedback = profile_call(generator.generate_overall_feedback, submission_path, fmt,
+                            profile_path=profile_path)
+    
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(feedback)
+    
+    return {
+        "submission": submission_path,
+        "passed": True,
+        "score": generator.score,
+        "result": generator.result,
+        "timings": generator.result["timings"],
+        "output": output_path
+    }
+
+
+def _batch_job(submission_path: str, root: str, output_dir: str, filename: str,
+               cache_dir: Optional[str], fmt: str, profile_dir: Optional[str]) -> Dict[str, Any]:
+    relative = os.path.relpath(submission_path, root)
+    output_path = os.path.join(output_dir, relative, filename)
+    return generate_feedback_file(submission_path, output_path, cache_dir, fmt, profile_dir)
+
+
 def main():
     """Main function to generate feedback."""
-    if len(sys.argv) < 2:
-        print("Usage: python generate_feedback.py <submission_path>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Generate automated feedback for a submission")
+    parser.add_argument("submission_path", nargs="?", help="Path to the submission directory")
+    parser.add_argument("--output", "-o", default="feedback.md",
+                        help="Output markdown file (file name inside each submission's folder in batch mode)")
+    parser.add_argument("--batch", metavar="ROOT",
+                        help="Generate feedback for every <username>/week-XX submission under ROOT")
+    parser.add_argument("--output-dir", default="feedback",
+                        help="Directory for batch feedback, mirroring ROOT's layout (default: feedback)")
+    parser.add_argument("--workers", "-j", type=int,
+                        help="Number of worker processes for batch mode (default: CPU count)")
+    parser.add_argument("--format", choices=["markdown", "json", "html"],
+                        help="Output format (default: from the output file extension, else markdown)")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_STORE_PATH, metavar="PATH",
+                        help=f"Append results to the cohort result store (default path: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--profile-dir",
+                        help="Run under cProfile and keep pstats files for the slowest submissions here")
+    parser.add_argument("--profile-top", type=int, default=5,
+                        help="How many of the slowest submissions' profiles to keep (default: 5)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached feedback (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Regenerate feedback even if the submission is unchanged")
     
-    submission_path = sys.argv[1]
+    args = parser.parse_args()
+    cache_dir = None if args.no_cache else args.cache_dir
+    run_id = new_run_id()
+    fmt = args.format or format_for_path(args.output, default="markdown")
+    if fmt == "text":
+        fmt = "markdown"
+    
+    if args.batch:
+        submissions = discover_submissions(args.batch)
+        if not submissions:
+            print(f"No submissions found under: {args.batch}")
+            sys.exit(1)
+        
+        print(f"🚀 Generating feedback for {len(submissions)} submissions under: {args.batch}")
+        job = partial(_batch_job, root=args.batch, output_dir=args.output_dir,
+                      filename=args.output, cache_dir=cache_dir, fmt=fmt,
+                      profile_dir=args.profile_dir)
+        batch = timed_batch(job, submissions, args.workers)
+        summary = batch["summary"]
+        
+        print(f"✅ Feedback written for {summary['passed']}/{summary['total_submissions']} submissions "
+              f"to {args.output_dir} in {summary['elapsed_seconds']}s")
+        failed = [r for r in batch["submissions"] if not r.get("passed")]
+        for result in failed:
+            print(f"  ❌ {result['submission']}: {'; '.join(result.get('errors', []))}")
+        
+        if args.profile_dir:
+            kept = prune_profiles(args.profile_dir, batch["submissions"], args.profile_top)
+            print(f"\n🔬 Profiles of the {len(kept)} slowest submissions in: {args.profile_dir}")
+            for submission, profile in kept.items():
+                print(f"  • {submission}: {profile}")
+        
+        if args.store:
+            try:
+                rows = [from_feedback_result(result["result"], result["submission"], run_id)
+                        for result in batch["submissions"] if result.get("passed")]
+                count = store_results(args.store, rows)
+                print(f"\n🗄️  Stored {count} results in: {args.store}")
+            except Exception as e:
+                print(f"Error storing results: {e}")
+        
+        sys.exit(0 if not failed else 1)
+    
+    if not args.submission_path:
+        parser.error("submission_path is required unless --batch is given")
+    
+    submission_path = args.submission_path
     if not os.path.exists(submission_path):
         print(f"Error: Path {submission_path} does not exist")
         sys.exit(1)
     
-    generator = FeedbackGenerator()
-    feedback = generator.generate_overall_feedback(submission_path)
-    generator.save_feedback(feedback)
+    cache = None
+    if cache_dir:
+        cache = ResultCache(cache_dir, namespace="generate_feedback", version=FEEDBACK_VERSION)
+    
+    generator = FeedbackGenerator(cache=cache)
+    profile_path = profile_path_for(args.profile_dir, submission_path) if args.profile_dir else None
+    feedback = profile_call(generator.generate_overall_feedback, submission_path, fmt,
+                            profile_path=profile_path)
+    generator.save_feedback(feedback, args.output)
+    if profile_path:
+        print(f"🔬 Profile saved to: {profile_path}")
+    
+    if args.store:
+        try:
+            count = store_results(args.store, [from_feedback_result(generator.result, submission_path, run_id)])
+            print(f"\n🗄️  Stored {count} result in: {args.store}")
+        except Exception as e:
+            print(f"Error storing results: {e}")
     
     print("Feedback generation completed successfully!")
 
@@ -6,29 +6,20 @@ import argparse
 import sys
 from datetime import datetime
 from github import Github, GithubException
-import requests
+
+from github_graphql import GraphQLClient, ProjectItemWriter
+from github_http import add_http_cache_arguments, print_cache_stats, setup_http_cache
 
 # TODO: Set this to your GitHub Project (beta/v2) node_id
 PROJECT_NODE_ID = "<YOUR_PROJECT_NODE_ID>"
 
 def add_issue_to_project(issue_node_id, project_node_id, github_token):
-    query = """
-    mutation {
-      addProjectV2ItemById(input: {projectId: \"%s\", contentId: \"%s\"}) {
-        item { id }
-      }
-    }
-    """ % (project_node_id, issue_node_id)
-    headers = {
-        "Authorization": f"Bearer {github_token}",
-        "Content-Type": "application/json"
-    }
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
-    print("Add to project response:", response.json())
+    writer = ProjectItemWriter(GraphQLClient(github_token), project_node_id)
+    result = writer.add_items([issue_node_id])[0]
+    if result.ok:
+        print(f"Added issue to project (item {result.item_id})")
+    else:
+        print(f"Error adding issue to project: {result.error}")
 
 def main():
     parser = argparse.ArgumentParser(description="Create a specific GitHub issue for an assignee with due date, tags, and comment.")
@@ -40,8 +31,10 @@ def main():
     parser.add_argument("--comment", required=False, help="Optional comment to add after issue creation")
     parser.add_argument("--token", required=True, help="GitHub token")
     parser.add_argument("--repo", default="NERD-Community-Ethiopia/generative-ai-course", help="Repository name (owner/repo)")
+    add_http_cache_arguments(parser)
     args = parser.parse_args()
 
+    http_cache = setup_http_cache(args)
     g = Github(args.token)
     repo = g.get_repo(args.repo)
 
@@ -76,7 +69,7 @@ def main():
         )
         print(f"Created issue: {issue.title} (#{issue.number}) assigned to {args.assignee}")
         # Add the created issue to the GitHub Project (beta/v2)
-        add_issue_to_project(issue.node_id, PROJECT_NODE_ID, g._Github__requester._Authorization__token)
+        add_issue_to_project(issue.node_id, PROJECT_NODE_ID, args.token)
     except GithubException as e:
         print(f"Error creating issue: {e}")
         sys.exit(1)
@@ -89,5 +82,8 @@ def main():
         except GithubException as e:
             print(f"Error adding comment: {e}")
 
+    if http_cache:
+        print_cache_stats(http_cache)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
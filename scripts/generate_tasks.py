@@ -10,6 +10,7 @@ import argparse
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import requests
@@ -20,6 +21,10 @@ except ImportError:
     print("Error: PyGithub not installed. Run: pip install PyGithub")
     sys.exit(1)
 
+from github_graphql import GraphQLClient, ProjectItemWriter, graphql_url_for
+from github_http import (DEFAULT_CONCURRENCY, GITHUB_API_URL, GitHubSession, add_http_cache_arguments,
+                         print_cache_stats, setup_http_cache)
+
 # TODO: Set this to your GitHub Project (beta/v2) node_id
 PROJECT_NODE_ID = "<YOUR_PROJECT_NODE_ID>"
 
@@ -33,29 +38,18 @@ def get_current_week(start_date):
     week = delta.days // 7 + 1
     return min(max(week, 1), 8)  # Clamp between 1 and 8
 
-def add_issue_to_project(issue_node_id, project_node_id, github_token):
-    query = """
-    mutation {
-      addProjectV2ItemById(input: {projectId: \"%s\", contentId: \"%s\"}) {
-        item { id }
-      }
-    }
-    """ % (project_node_id, issue_node_id)
-    headers = {
-        "Authorization": f"Bearer {github_token}",
-        "Content-Type": "application/json"
-    }
-    response = requests.post(
-        "https://api.github.com/graphql",
-        json={"query": query},
-        headers=headers
-    )
-    print("Add to project response:", response.json())
-
 class TaskGenerator:
-    def __init__(self, token: str, repo_name: str = "NERD-Community-Ethiopia/generative-ai-course"):
-        self.github = Github(token)
+    def __init__(self, token: str, repo_name: str = "NERD-Community-Ethiopia/generative-ai-course",
+                 api_url: str = GITHUB_API_URL, concurrency: int = DEFAULT_CONCURRENCY):
+        self.github = Github(token, base_url=api_url)
         self.repo = self.github.get_repo(repo_name)
+        self.repo_name = repo_name
+        self.concurrency = max(concurrency, 1)
+        # One keep-alive connection pool (and rate-limit backoff) shared by all workers
+        self.http = GitHubSession(token, api_url, pool_size=self.concurrency)
+        self.graphql = GraphQLClient(token, graphql_url_for(api_url), session=self.http.session,
+                                     gate=self.http.gate)
+        self.project_items = ProjectItemWriter(self.graphql, PROJECT_NODE_ID)
         self.week_templates = self._load_week_templates()
     
     def _load_week_templates(self) -> Dict:
@@ -241,9 +235,9 @@ class TaskGenerator:
         milestone_title = f"Week {week}"
         
         # Check if milestone already exists
-        for milestone in self.repo.get_milestones(state='open'):
-            if milestone.title == milestone_title:
-                return milestone.number
+        existing = self.graphql.fetch_open_milestones(self.repo_name)
+        if milestone_title in existing:
+            return existing[milestone_title]
         
         # Create new milestone
         try:
@@ -275,7 +269,7 @@ class TaskGenerator:
             {"name": "help wanted", "color": "008672", "description": "Extra attention is needed"},
         ]
         
-        existing_labels = {label.name for label in self.repo.get_labels()}
+        existing_labels = set(self.graphql.fetch_labels(self.repo_name))
         
         for label in labels_to_create:
             if label["name"] not in existing_labels:
@@ -285,8 +279,34 @@ class TaskGenerator:
                 except GithubException as e:
                     print(f"Error creating label {label['name']}: {e}")
     
+    def add_to_project(self, issues: List[Dict]):
+        """Add created issues to the GitHub Project (beta/v2), batched into few requests"""
+        results = self.project_items.add_items([issue["node_id"] for issue in issues])
+        numbers = {issue["node_id"]: issue["number"] for issue in issues}
+        for result in results:
+            if not result.ok:
+                print(f"Error adding issue #{numbers[result.content_id]} to project: {result.error}")
+        added = sum(1 for result in results if result.ok)
+        print(f"Added {added} of {len(results)} issues to the project")
+    
+    def _create_task_issue(self, task: Dict, milestone_number: Optional[int]) -> Dict:
+        """Create one task's issue; runs on a worker thread"""
+        return self.http.create_issue(
+            self.repo_name,
+            title=task["title"],
+            body=task["body"],
+            labels=task["labels"],
+            assignees=task["assignees"],
+            milestone=milestone_number
+        )
+    
     def generate_tasks(self, week: str, task_type: str = "all"):
-        """Generate tasks for the specified week"""
+        """Generate tasks for the specified week
+        
+        Issues are created concurrently (up to `concurrency` at a time) and
+        returned as API JSON, in template order. Issue numbers follow that
+        order only when `concurrency` is 1.
+        """
         if week not in self.week_templates:
             print(f"Error: No template found for week {week}")
             return
@@ -305,26 +325,30 @@ class TaskGenerator:
         if task_type != "all":
             tasks = [task for task in tasks if task_type in task["labels"]]
         
-        created_issues = []
+        created = []
         
-        for task in tasks:
-            try:
-                # Create issue
-                issue = self.repo.create_issue(
-                    title=task["title"],
-                    body=task["body"],
-                    labels=task["labels"],
-                    assignees=task["assignees"],
-                    milestone=milestone_number
-                )
-                # Add the created issue to the GitHub Project (beta/v2)
-                add_issue_to_project(issue.node_id, PROJECT_NODE_ID, self.github._Github__requester._Authorization__token)
-                created_issues.append(issue)
-                print(f"Created issue: {issue.title} (#{issue.number})")
-                
-            except GithubException as e:
-                print(f"Error creating issue '{task['title']}': {e}")
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {
+                pool.submit(self._create_task_issue, task, milestone_number): (index, task)
+                for index, task in enumerate(tasks)
+            }
+            for future in as_completed(futures):
+                index, task = futures[future]
+                try:
+                    issue = future.result()
+                except requests.RequestException as e:
+                    print(f"Error creating issue '{task['title']}': {e}")
+                    if e.response is not None and e.response.status_code >= 500:
+                        print("  The issue may have been created anyway; check before re-running")
+                    continue
+                created.append((index, issue))
+                print(f"Created issue: {issue['title']} (#{issue['number']})")
         
+        # Completion order is arbitrary; the board lists tasks as the template does
+        created_issues = [issue for _, issue in sorted(created, key=lambda item: item[0])]
+        
+        if created_issues:
+            self.add_to_project(created_issues)
         print(f"\nCreated {len(created_issues)} issues for Week {week}")
         return created_issues
 
@@ -337,6 +361,12 @@ def main():
     parser.add_argument("--token", required=True, help="GitHub token")
     parser.add_argument("--repo", default="NERD-Community-Ethiopia/generative-ai-course",
                        help="Repository name (owner/repo)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                       help=f"Issues to create at the same time (default: {DEFAULT_CONCURRENCY}); "
+                            "above 1, issue numbers may not follow template order")
+    parser.add_argument("--api-url", default=GITHUB_API_URL,
+                       help=f"GitHub REST API base URL, e.g. for Enterprise Server or a mock (default: {GITHUB_API_URL})")
+    add_http_cache_arguments(parser)
     
     args = parser.parse_args()
     
@@ -353,10 +383,14 @@ def main():
         sys.exit(1)
     
     # Create task generator
-    generator = TaskGenerator(args.token, args.repo)
+    http_cache = setup_http_cache(args)
+    generator = TaskGenerator(args.token, args.repo, api_url=args.api_url, concurrency=args.concurrency)
     
     # Generate tasks
     generator.generate_tasks(week, args.type)
+    
+    if http_cache:
+        print_cache_stats(http_cache)
 
 
 if __name__ == "__main__":
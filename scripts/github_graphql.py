@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+GitHub GraphQL Client
+
+Bulk reads for the task scripts. Over REST, listing issues costs one
+request per 30-100 issues plus lazy completion calls for labels,
+assignees and milestones; here one query returns 100 issues with all of
+those. ProjectItemWriter does the same for
+writes, packing many addProjectV2ItemById mutations into one request.
+The endpoint can be pointed at a local stub server with GITHUB_GRAPHQL_URL.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+
+from github_http import GITHUB_API_URL, RateLimitGate, send_with_retry
+from issue_snapshot import IssueRecord, IssueSnapshot
+
+
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", "https://api.github.com/graphql")
+DEFAULT_API_URL = "https://api.github.com"
+PAGE_SIZE = 100
+DEFAULT_TIMEOUT = 30
+# Aliased mutations per request; large batches risk secondary rate limits and timeouts
+DEFAULT_MUTATION_BATCH = 50
+
+# Labels and assignees beyond the first 100 per issue are not fetched. No
+# Projects (v2) fields: reading them needs the read:project scope, which
+# the repo-scoped tokens of the task scripts do not have
+ISSUE_FIELDS = """
+number
+title
+body
+databaseId
+id
+labels(first: 100) { nodes { name } }
+assignees(first: 100) { nodes { login } }
+milestone { title }
+"""
+
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $states: [IssueState!], $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    items: issues(states: $states, first: $first, after: $after, orderBy: {field: CREATED_AT, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { %s }
+    }
+  }
+}
+""" % ISSUE_FIELDS
+
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $states: [PullRequestState!], $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    items: pullRequests(states: $states, first: $first, after: $after, orderBy: {field: CREATED_AT, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { %s }
+    }
+  }
+}
+""" % ISSUE_FIELDS
+
+LABELS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    items: labels(first: $first, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name }
+    }
+  }
+}
+"""
+
+MILESTONES_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    items: milestones(states: [OPEN], first: $first, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes { number title }
+    }
+  }
+}
+"""
+
+
+class GraphQLError(Exception):
+    """The API answered with GraphQL errors."""
+
+    def __init__(self, errors: List[Dict[str, Any]]):
+        self.errors = errors
+        super().__init__("; ".join(error.get("message", str(error)) for error in errors))
+
+
+def split_repo_name(repo_name: str) -> Tuple[str, str]:
+    """Split "owner/name" into its parts."""
+    owner, _, name = repo_name.partition("/")
+    if not owner or not name:
+        raise ValueError(f"Repository must be given as owner/name, got: {repo_name}")
+    return owner, name
+
+
+def graphql_url_for(api_url: str = GITHUB_API_URL) -> str:
+    """The GraphQL endpoint that goes with a REST API base URL."""
+    base = api_url.rstrip("/")
+    if base == DEFAULT_API_URL:
+        return GITHUB_GRAPHQL_URL
+    # GitHub Enterprise Server serves REST at /api/v3 and GraphQL at /api/graphql
+    if base.endswith("/api/v3"):
+        return base[:-len("v3")] + "graphql"
+    return f"{base}/graphql"
+
+
+def record_from_node(node: Dict[str, Any], is_pull_request: bool = False) -> IssueRecord:
+    """Build an IssueRecord from an issue or pull request node."""
+    return IssueRecord(
+        number=node["number"],
+        title=node["title"],
+        body=node.get("body") or "",
+        labels=[label["name"] for label in node["labels"]["nodes"]],
+        assignees=[assignee["login"] for assignee in node["assignees"]["nodes"]],
+        milestone=node["milestone"]["title"] if node.get("milestone") else None,
+        is_pull_request=is_pull_request,
+        id=node.get("databaseId"),
+        node_id=node.get("id")
+    )
+
+
+class GraphQLClient:
+    """Runs queries against the GitHub GraphQL API over one keep-alive session."""
+
+    def __init__(self, token: str, endpoint: str = GITHUB_GRAPHQL_URL,
+                 session: Optional[requests.Session] = None, timeout: float = DEFAULT_TIMEOUT,
+                 gate: Optional[RateLimitGate] = None):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.gate = gate
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json"
+        })
+        self.requests_made = 0
+
+    def execute_partial(self, query: str,
+                        variables: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Run a query and return its data along with any errors, which may cover only part of it."""
+        # Queries are read-only and safe to resend after a server error; mutations are not
+        response = send_with_retry(self.session, "POST", self.endpoint, self.gate,
+                                   idempotent=not query.lstrip().startswith("mutation"),
+                                   json={"query": query, "variables": variables or {}},
+                                   timeout=self.timeout)
+        self.requests_made += 1
+        response.raise_for_status()
+        payload = response.json()
+        return payload.get("data") or {}, payload.get("errors") or []
+
+    def execute(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a query and return its data, raising GraphQLError on errors."""
+        data, errors = self.execute_partial(query, variables)
+        if errors:
+            raise GraphQLError(errors)
+        return data
+
+    def paginate(self, query: str, variables: Dict[str, Any],
+                 page_size: int = PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield the nodes of a repository connection aliased as `items`, a page per request."""
+        after = None
+        while True:
+            data = self.execute(query, dict(variables, first=page_size, after=after))
+            repository = data.get("repository")
+            if repository is None:
+                raise GraphQLError([{"message": f"Repository not found: {variables.get('owner')}/{variables.get('name')}"}])
+            connection = repository["items"]
+            yield from connection["nodes"]
+            if not connection["pageInfo"]["hasNextPage"]:
+                return
+            after = connection["pageInfo"]["endCursor"]
+
+    def fetch_issues(self, repo_name: str, states: Sequence[str] = ("OPEN",)) -> Iterator[IssueRecord]:
+        """Issues (without pull requests) with labels, assignees and milestone."""
+        owner, name = split_repo_name(repo_name)
+        variables = {"owner": owner, "name": name, "states": list(states)}
+        for node in self.paginate(ISSUES_QUERY, variables):
+            yield record_from_node(node)
+
+    def fetch_pull_requests(self, repo_name: str, states: Sequence[str] = ("OPEN",)) -> Iterator[IssueRecord]:
+        """Pull requests with the same fields as fetch_issues."""
+        owner, name = split_repo_name(repo_name)
+        variables = {"owner": owner, "name": name, "states": list(states)}
+        for node in self.paginate(PULL_REQUESTS_QUERY, variables):
+            yield record_from_node(node, is_pull_request=True)
+
+    def fetch_issue_snapshot(self, repo_name: str, include_pull_requests: bool = True) -> IssueSnapshot:
+        """Open issues (and pull requests, like the REST issue list) as a snapshot."""
+        records = list(self.fetch_issues(repo_name))
+        if include_pull_requests:
+            records.extend(self.fetch_pull_requests(repo_name))
+        return IssueSnapshot(records)
+
+    def fetch_labels(self, repo_name: str) -> List[str]:
+        owner, name = split_repo_name(repo_name)
+        return [node["name"] for node in self.paginate(LABELS_QUERY, {"owner": owner, "name": name})]
+
+    def fetch_open_milestones(self, repo_name: str) -> Dict[str, int]:
+        """Open milestone titles mapped to their numbers."""
+        owner, name = split_repo_name(repo_name)
+        nodes = self.paginate(MILESTONES_QUERY, {"owner": owner, "name": name})
+        return {node["title"]: node["number"] for node in nodes}
+
+
+@dataclass
+class ProjectItemResult:
+    """Outcome of adding one issue or pull request to a project."""
+    content_id: str
+    item_id: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.item_id is not None
+
+
+class ProjectItemWriter:
+    """Adds content to a Projects (v2) board, many items per GraphQL request.
+
+    Each item is an aliased addProjectV2ItemById mutation in the same
+    document, so one failing item (e.g. already on the board, or no
+    access) does not fail the others.
+    """
+
+    def __init__(self, client: GraphQLClient, project_id: str, batch_size: int = DEFAULT_MUTATION_BATCH):
+        self.client = client
+        self.project_id = project_id
+        self.batch_size = max(batch_size, 1)
+
+    @staticmethod
+    def build_mutation(count: int) -> str:
+        """A mutation adding `count` items, aliased i0..iN with content ids $c0..$cN."""
+        params = "".join(f", $c{index}: ID!" for index in range(count))
+        fields = "\n".join(
+            f"  i{index}: addProjectV2ItemById(input: {{projectId: $projectId, contentId: $c{index}}}) "
+            f"{{ item {{ id }} }}"
+            for index in range(count)
+        )
+        return f"mutation($projectId: ID!{params}) {{\n{fields}\n}}"
+
+    def add_items(self, content_ids: Sequence[str]) -> List[ProjectItemResult]:
+        """Add every content id to the project and report each one's result, in order."""
+        results: List[ProjectItemResult] = []
+        for start in range(0, len(content_ids), self.batch_size):
+            results.extend(self._add_batch(list(content_ids[start:start + self.batch_size])))
+        return results
+
+    def _add_batch(self, content_ids: List[str]) -> List[ProjectItemResult]:
+        variables: Dict[str, Any] = {"projectId": self.project_id}
+        variables.update({f"c{index}": content_id for index, content_id in enumerate(content_ids)})
+        try:
+            data, errors = self.client.execute_partial(self.build_mutation(len(content_ids)), variables)
+        except (requests.RequestException, ValueError) as e:
+            return [ProjectItemResult(content_id, error=str(e)) for content_id in content_ids]
+
+        # Errors name the alias they belong to in their path; the rest apply to every item
+        item_errors: Dict[str, str] = {}
+        general_errors = []
+        for error in errors:
+            path = error.get("path") or []
+            if path and str(path[0]) in {f"i{index}" for index in range(len(content_ids))}:
+                item_errors[str(path[0])] = error.get("message", str(error))
+            else:
+                general_errors.append(error.get("message", str(error)))
+
+        results = []
+        for index, content_id in enumerate(content_ids):
+            alias = f"i{index}"
+            payload = data.get(alias) or {}
+            item = payload.get("item") or {}
+            if item.get("id"):
+                results.append(ProjectItemResult(content_id, item_id=item["id"]))
+            else:
+                error = item_errors.get(alias) or "; ".join(general_errors) or "No project item returned"
+                results.append(ProjectItemResult(content_id, error=error))
+        return results
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+GitHub HTTP Helpers
+
+A persistent on-disk cache for GitHub API reads using conditional
+requests. Each cached GET is revalidated with If-None-Match /
+If-Modified-Since; an unchanged resource comes back as a 304, which
+GitHub does not count against the rate limit, and the stored body is
+served in its place. The cache is a requests transport adapter, so it
+works under PyGithub (via install_github_cache) and any requests session.
+Only REST GETs are cached: with issues, labels and milestones read over
+GraphQL, that leaves the repository, organization and single-issue
+lookups the task scripts make through PyGithub.
+
+Also a pooled session for concurrent writes (GitHubSession) that backs
+off on primary and secondary rate limits, honoring Retry-After.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+DEFAULT_HTTP_CACHE_DIR = os.getenv("GITHUB_HTTP_CACHE_DIR", ".github-cache")
+DEFAULT_MAX_ENTRIES = 2000
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 30
+# GitHub asks clients hitting a secondary limit without Retry-After to wait at least a minute
+SECONDARY_LIMIT_WAIT = 60.0
+RETRYABLE_STATUSES = {502, 503, 504}
+# Safe to resend after a 5xx; a POST may have taken effect before the error
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Describe the stored (already decoded) body, so they must not be replayed
+_BODY_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class HTTPCache:
+    """ETag / Last-Modified entries stored as JSON metadata plus a body file."""
+
+    def __init__(self, cache_dir: str = DEFAULT_HTTP_CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir) / "http"
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(request: requests.PreparedRequest) -> str:
+        """Responses vary by URL, Accept header and credentials."""
+        auth = request.headers.get("Authorization", "")
+        parts = [request.method, request.url, request.headers.get("Accept", ""),
+                 hashlib.sha256(auth.encode('utf-8')).hexdigest()]
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            entry["body"] = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key: str, response: requests.Response):
+        """Store a validated response body with its validators."""
+        entry = {
+            "url": response.url,
+            "status": response.status_code,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "headers": {name: value for name, value in response.headers.items()
+                        if name.lower() not in _BODY_HEADERS}
+        }
+        meta_path, body_path = self._paths(key)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Body first, so metadata never points at a missing or stale body
+        self._write_atomic(body_path, response.content)
+        self._write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+        self.evict()
+
+    def touch(self, key: str):
+        """Mark an entry as recently used for eviction."""
+        try:
+            os.utime(self._paths(key)[0])
+        except OSError:
+            pass
+
+    def _write_atomic(self, path: Path, data: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def evict(self):
+        """Drop least-recently-used entries beyond max_entries."""
+        try:
+            entries = sorted(self.cache_dir.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        except OSError:
+            return
+        for meta_path in entries[:max(len(entries) - self.max_entries, 0)]:
+            for path in (meta_path, meta_path.with_suffix(".body")):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def record(self, outcome: str):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """Conditional GETs answered from the cache (304) versus fetched in full."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class CachingAdapter(HTTPAdapter):
+    """HTTPAdapter that turns cached GETs into conditional requests."""
+
+    def __init__(self, cache: HTTPCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if request.method != "GET":
+            # Writes and GraphQL POSTs have no validators to revalidate
+            self.cache.record("uncached")
+            return super().send(request, **kwargs)
+
+        key = self.cache.key_for(request)
+        entry = self.cache.get(key)
+        if entry:
+            if entry.get("etag"):
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.record("hits")
+            self.cache.touch(key)
+            return self._from_cache(response, entry)
+
+        self.cache.record("misses")
+        if response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+            self.cache.put(key, response)
+        return response
+
+    @staticmethod
+    def _from_cache(response: requests.Response, entry: Dict[str, Any]) -> requests.Response:
+        """Turn a 304 into the cached response, keeping the 304's fresh headers (e.g. rate limits)."""
+        # Reading the (empty) 304 body hands the connection back to the pool
+        response.content
+        headers = CaseInsensitiveDict(entry["headers"])
+        headers.update({name: value for name, value in response.headers.items()
+                        if name.lower() not in _BODY_HEADERS})
+        response.status_code = entry["status"]
+        response.reason = "OK (cached)"
+        response.headers = headers
+        response._content = entry["body"]
+        response.from_cache = True
+        return response
+
+
+def cached_session(cache: HTTPCache, session: Optional[requests.Session] = None) -> requests.Session:
+    """A requests session (new or given) whose GETs go through the cache."""
+    session = session or requests.Session()
+    adapter = CachingAdapter(cache)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def install_github_cache(cache: HTTPCache):
+    """Route every PyGithub request made after this call through the cache.
+
+    With injected connection classes PyGithub builds a new connection
+    object per request and closes the previous one. They all share one
+    session per scheme, whose close is a no-op, so keep-alive connections
+    are still reused.
+    """
+    from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+
+    sessions: Dict[str, requests.Session] = {}
+    lock = threading.Lock()
+
+    def with_cache(base, scheme):
+        class CachedConnection(base):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                with lock:
+                    if scheme not in sessions:
+                        session = requests.Session()
+                        session.auth = self.session.auth
+                        session.mount(scheme, CachingAdapter(cache, max_retries=self.retry,
+                                                             pool_connections=self.pool_size,
+                                                             pool_maxsize=self.pool_size))
+                        sessions[scheme] = session
+                self.session.close()
+                self.session = sessions[scheme]
+
+            def close(self):
+                # The shared session outlives every single request
+                pass
+        return CachedConnection
+
+    Requester.injectConnectionClasses(with_cache(HTTPRequestsConnectionClass, "http://"),
+                                      with_cache(HTTPSRequestsConnectionClass, "https://"))
+
+
+def print_cache_stats(cache: HTTPCache):
+    """One-line summary of cache use for the end of a script run."""
+    stats = cache.stats()
+    if stats["hits"] or stats["misses"]:
+        print(f"HTTP cache: {stats['hits']} of {stats['hits'] + stats['misses']} GET requests "
+              f"answered with 304 Not Modified ({stats['hit_rate']:.0%})")
+
+
+def add_http_cache_arguments(parser):
+    """The cache options shared by the task scripts."""
+    parser.add_argument("--http-cache-dir", default=DEFAULT_HTTP_CACHE_DIR,
+                        help=f"Directory for cached GitHub API responses (default: {DEFAULT_HTTP_CACHE_DIR})")
+    parser.add_argument("--no-http-cache", action="store_true",
+                        help="Send every GitHub API request unconditionally")
+
+
+def setup_http_cache(args) -> Optional[HTTPCache]:
+    """Install the cache for PyGithub unless --no-http-cache was given."""
+    if args.no_http_cache:
+        return None
+    cache = HTTPCache(args.http_cache_dir)
+    install_github_cache(cache)
+    return cache
+
+
+class RateLimitGate:
+    """Pauses every thread sharing it once any one of them is rate limited."""
+
+    def __init__(self):
+        self._until = 0.0
+        self._lock = threading.Lock()
+
+    def block_for(self, seconds: float):
+        with self._lock:
+            self._until = max(self._until, time.monotonic() + seconds)
+
+    def wait(self):
+        with self._lock:
+            delay = self._until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def retry_delay(response: requests.Response, attempt: int, idempotent: bool = True) -> Optional[float]:
+    """Seconds to wait before retrying a response, or None if it should not be retried.
+
+    Rate-limit responses are rejected before the request is processed, so
+    they are always retried; server errors only for idempotent requests.
+    """
+    headers = response.headers
+    if response.status_code in (403, 429):
+        if "Retry-After" in headers:
+            try:
+                return max(float(headers["Retry-After"]), 0.0)
+            except ValueError:
+                return SECONDARY_LIMIT_WAIT
+        if headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+            return max(float(headers["X-RateLimit-Reset"]) - time.time(), 0.0) + 1
+        if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+            return SECONDARY_LIMIT_WAIT * 2 ** attempt
+        return None
+    if response.status_code in RETRYABLE_STATUSES and idempotent:
+        return float(2 ** attempt)
+    return None
+
+
+def send_with_retry(session: requests.Session, method: str, url: str,
+                    gate: Optional[RateLimitGate] = None, max_retries: int = DEFAULT_MAX_RETRIES,
+                    idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+    """Send a request, waiting out rate limits and transient errors up to max_retries times.
+
+    idempotent defaults to what the method implies. A non-idempotent request
+    that fails with a server error is returned as is: GitHub often completes
+    the write anyway, and resending it would, say, file a duplicate issue.
+    """
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    for attempt in range(max_retries + 1):
+        if gate:
+            gate.wait()
+        response = session.request(method, url, **kwargs)
+        delay = retry_delay(response, attempt, idempotent)
+        if delay is None or attempt == max_retries:
+            return response
+        print(f"Rate limited or unavailable ({response.status_code}) on {method} {url}; "
+              f"retrying in {delay:.0f}s")
+        if gate:
+            gate.block_for(delay)
+        else:
+            time.sleep(delay)
+    return response
+
+
+class GitHubSession:
+    """A pooled keep-alive session for concurrent GitHub REST calls."""
+
+    def __init__(self, token: str, api_url: str = GITHUB_API_URL, pool_size: int = DEFAULT_CONCURRENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES, timeout: float = DEFAULT_TIMEOUT):
+        self.api_url = api_url.rstrip("/")
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.gate = RateLimitGate()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28"
+        })
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request to an API path (or full URL) with rate-limit retries."""
+        url = path if path.startswith(("http://", "https://")) else f"{self.api_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        return send_with_retry(self.session, method, url, self.gate, self.max_retries, **kwargs)
+
+    def create_issue(self, repo_name: str, **fields) -> Dict[str, Any]:
+        """Create an issue and return its JSON; raises requests.HTTPError on failure.
+
+        Not retried on server errors, after which the issue may exist anyway.
+        """
+        response = self.request("POST", f"/repos/{repo_name}/issues", json=fields)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Grading Service
+
+A small long-running process that keeps a pool of warm grading workers,
+so repeated grading requests (e.g. from CI) skip interpreter start-up and
+share the result cache. Jobs are submitted over HTTP, queued on a bounded
+queue and can be polled or streamed:
+
+    curl -X POST localhost:8000/jobs -d '{"submission": "student-submissions/alice/week-01"}'
+    curl localhost:8000/jobs/<id>?wait=60      # long-poll until the job finishes
+    curl -N localhost:8000/jobs/<id>/events    # server-sent events as the job progresses
+
+POST /jobs?wait=60 submits and waits in one call. With `--watch` the
+service also rescans a `student-submissions/` tree periodically and
+re-checks every submission whose files changed. `/health` reports
+liveness and `/metrics` serves OpenMetrics text for Prometheus: queue
+depth, submissions graded, per-stage latency histograms (from the
+instrumentation timings in each report), cache hits and misses, and
+worker utilization.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from check_submission import SubmissionChecker, make_cache
+from generate_feedback import FEEDBACK_VERSION, FeedbackGenerator
+from grading_metrics import (OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE,
+                             MetricsRegistry, wants_openmetrics)
+from result_cache import DEFAULT_CACHE_DIR, ResultCache
+from submission_batch import default_workers, discover_submissions
+
+
+DEFAULT_PORT = 8000
+DEFAULT_SCAN_INTERVAL = 300.0
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_MAX_JOBS = 1000
+MAX_WAIT_SECONDS = 300.0
+MAX_REQUEST_BYTES = 64 * 1024
+KEEPALIVE_SECONDS = 15.0
+TOOLS = ("check", "feedback")
+
+# Stage latencies range from sub-millisecond cache lookups to long checks
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def grade_submission(tool: str, submission_path: str, cache_dir: Optional[str]) -> Dict[str, Any]:
+    """Grade one submission in a worker process.
+
+    Returns the tool's report and whether it was served from the result
+    cache. Workers are reused between jobs, so module-level caches (parsed
+    file summaries, the style checker) stay warm.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        if tool == "check":
+            cache = make_cache(cache_dir)
+            report = SubmissionChecker(submission_path, verbose=False, cache=cache).run_all_checks()
+            report["submission"] = submission_path
+        elif tool == "feedback":
+            cache = ResultCache(cache_dir, namespace="generate_feedback",
+                                version=FEEDBACK_VERSION) if cache_dir else None
+            generator = FeedbackGenerator(cache)
+            generator.generate_overall_feedback(submission_path)
+            # Feedback always "passes"; the score is what matters
+            report = dict(generator.result, submission=submission_path, passed=True)
+        else:
+            raise ValueError(f"Unknown tool: {tool}")
+
+    return {"report": report, "cache_hit": bool(cache and cache.hits)}
+
+
+def submission_signature(submission_path: str) -> str:
+    """Cheap fingerprint of a submission's file names, sizes and mtimes."""
+    digest = hashlib.blake2b(digest_size=16)
+    for dirpath, dirnames, filenames in os.walk(submission_path):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.') and d != "__pycache__")
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(path, submission_path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass
+class GradingJob:
+    """One submission queued for grading."""
+    submission: str
+    tool: str = "check"
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    changed: threading.Condition = field(default_factory=threading.Condition, repr=False, compare=False)
+
+    @property
+    def status(self) -> str:
+        if self.started_at is None and self.finished_at is None:
+            return "queued"
+        if self.finished_at is None:
+            return "running"
+        return "failed" if self.error else "done"
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def update(self, **changes):
+        """Change the job's fields and wake anyone waiting on it."""
+        with self.changed:
+            for name, value in changes.items():
+                setattr(self, name, value)
+            self.changed.notify_all()
+
+    def wait(self, timeout: float) -> bool:
+        """Block until the job finishes or timeout passes; True if finished."""
+        with self.changed:
+            return self.changed.wait_for(lambda: self.finished, timeout)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        job = {
+            "id": self.id,
+            "submission": self.submission,
+            "tool": self.tool,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+        if self.error:
+            job["error"] = self.error
+        if include_result and self.result is not None:
+            job["cache_hit"] = self.result["cache_hit"]
+            job["report"] = self.result["report"]
+        return job
+
+
+class GradingMetrics:
+    """The metrics the service exposes on /metrics."""
+
+    def __init__(self, service: "GradingService"):
+        self.registry = MetricsRegistry()
+        registry = self.registry
+        registry.gauge("grading_queue_depth", "Jobs waiting for a worker",
+                       callback=lambda: {(): service.queue.qsize()})
+        registry.gauge("grading_workers", "Grading worker processes",
+                       callback=lambda: {(): service.workers})
+        registry.gauge("grading_workers_busy", "Workers currently grading a submission",
+                       callback=lambda: {(): service.busy_workers})
+        registry.gauge("grading_worker_utilization", "Busy workers as a share of all workers",
+                       callback=lambda: {(): service.busy_workers / service.workers})
+        self.graded = registry.counter("grading_submissions_graded_total",
+                                       "Submissions graded, by tool and outcome", ("tool", "outcome"))
+        self.cache_requests = registry.counter("grading_cache_requests_total",
+                                               "Result cache lookups, by tool and result", ("tool", "result"))
+        registry.gauge("grading_cache_hit_ratio", "Result cache hits as a share of lookups", ("tool",),
+                       callback=self._hit_ratios)
+        self.job_seconds = registry.histogram("grading_job_duration_seconds",
+                                              "Wall time per graded submission, including cache lookups",
+                                              ("tool",), STAGE_BUCKETS)
+        self.wait_seconds = registry.histogram("grading_queue_wait_seconds",
+                                               "Time jobs spent queued before a worker picked them up",
+                                               ("tool",), STAGE_BUCKETS)
+        self.stage_seconds = registry.histogram("grading_stage_duration_seconds",
+                                                "Wall time per grading stage", ("tool", "stage"), STAGE_BUCKETS)
+        self.scans = registry.counter("grading_scans_total", "Rescans of the watched submissions tree")
+        self.last_scan = registry.gauge("grading_last_scan_timestamp_seconds",
+                                        "Unix time the last rescan finished")
+
+    def _hit_ratios(self) -> Dict[tuple, float]:
+        ratios = {}
+        for tool in TOOLS:
+            hits = self.cache_requests.value(tool=tool, result="hit")
+            lookups = hits + self.cache_requests.value(tool=tool, result="miss")
+            if lookups:
+                ratios[(tool,)] = hits / lookups
+        return ratios
+
+    def record(self, job: GradingJob):
+        """Update the metrics with a finished job."""
+        if job.started_at is None:
+            # Cancelled before a worker picked it up
+            self.graded.inc(tool=job.tool, outcome="error")
+            return
+        self.wait_seconds.observe(job.started_at - job.submitted_at, tool=job.tool)
+        self.job_seconds.observe(job.finished_at - job.started_at, tool=job.tool)
+        if job.error:
+            self.graded.inc(tool=job.tool, outcome="error")
+            return
+
+        report = job.result["report"]
+        self.graded.inc(tool=job.tool, outcome="pass" if report.get("passed") else "fail")
+        if "cache_lookup" in report.get("timings", {}).get("stages", {}):
+            self.cache_requests.inc(tool=job.tool, result="hit" if job.result["cache_hit"] else "miss")
+        for stage, timing in report.get("timings", {}).get("stages", {}).items():
+            self.stage_seconds.observe(timing["wall_seconds"], tool=job.tool, stage=stage)
+
+
+class GradingService:
+    """A bounded job queue drained by a persistent pool of grading processes."""
+
+    def __init__(self, workers: Optional[int] = None, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 watch_root: Optional[str] = None, scan_interval: float = DEFAULT_SCAN_INTERVAL,
+                 root: str = ".", max_queue: int = DEFAULT_MAX_QUEUE, max_jobs: int = DEFAULT_MAX_JOBS):
+        self.workers = workers or default_workers()
+        self.cache_dir = cache_dir
+        self.watch_root = watch_root
+        self.scan_interval = scan_interval
+        self.root = root
+        self.max_jobs = max_jobs
+        self.queue: "queue.Queue[Optional[GradingJob]]" = queue.Queue(maxsize=max_queue)
+        self.busy_workers = 0
+        self.started_at = time.time()
+        self.metrics = GradingMetrics(self)
+
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._pending: Dict[str, GradingJob] = {}
+        self._jobs: "OrderedDict[str, GradingJob]" = OrderedDict()
+        self._signatures: Dict[str, str] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """Start the worker pool, its dispatcher threads and the rescan loop."""
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # One dispatcher per worker process, so a busy dispatcher means a busy worker
+        for index in range(self.workers):
+            self._start_thread(self._dispatch, f"grading-dispatch-{index}")
+        if self.watch_root:
+            self._start_thread(self._watch, "grading-watch")
+
+    def _start_thread(self, target, name: str):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self):
+        """Stop accepting work, let running jobs finish and shut the pool down."""
+        self._stopping.set()
+        # Fail whatever is still queued so dispatchers see their stop signal promptly
+        while True:
+            try:
+                job = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.update(finished_at=time.time(), error="Service shut down before the job ran")
+                self.metrics.record(job)
+        for _ in range(self.workers):
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        if self._pool:
+            self._pool.shutdown(wait=True)
+
+    def resolve_submission(self, submission: str) -> str:
+        """Normalize a submission path, which must be a directory under the service root."""
+        path = os.path.normpath(os.path.join(self.root, submission))
+        root = os.path.realpath(self.root)
+        real = os.path.realpath(path)
+        if os.path.commonpath([root, real]) != root:
+            raise ValueError(f"Submission is outside the service root: {submission}")
+        if not os.path.isdir(real):
+            raise ValueError(f"Submission directory not found: {submission}")
+        return path
+
+    def submit(self, submission: str, tool: str = "check", block: bool = True) -> GradingJob:
+        """Queue a submission, or return the job already waiting for it.
+
+        Jobs that have started are not reused, since the submission may have
+        changed since they read it. With block=False a full queue raises
+        QueueFull instead of waiting for room.
+        """
+        if tool not in TOOLS:
+            raise ValueError(f"Unknown tool: {tool} (expected one of {', '.join(TOOLS)})")
+        if self._stopping.is_set():
+            raise QueueFull("Service is shutting down")
+
+        key = f"{tool}:{submission}"
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            job = GradingJob(submission=submission, tool=tool)
+            self._pending[key] = job
+        try:
+            self.queue.put(job, block=block)
+        except queue.Full:
+            with self._lock:
+                self._pending.pop(key, None)
+            raise QueueFull(f"Grading queue is full ({self.queue.maxsize} jobs)")
+
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[GradingJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent_jobs(self, limit: int = 100) -> List[GradingJob]:
+        """The most recently submitted jobs, newest first."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))[:limit]
+
+    def _forget_old_jobs(self):
+        # Keep at most max_jobs finished jobs for polling; unfinished ones always stay
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+            for job_id in finished[:max(len(finished) - self.max_jobs, 0)]:
+                del self._jobs[job_id]
+
+    def _dispatch(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self.busy_workers += 1
+                # From here on a new request for the submission gets a new job
+                self._pending.pop(f"{job.tool}:{job.submission}", None)
+            job.update(started_at=time.time())
+            result, error = None, None
+            try:
+                result = self._pool.submit(grade_submission, job.tool, job.submission,
+                                           self.cache_dir).result()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            job.update(result=result, error=error, finished_at=time.time())
+            with self._lock:
+                self.busy_workers -= 1
+            self.metrics.record(job)
+            self._forget_old_jobs()
+
+    def scan(self) -> int:
+        """Queue every watched submission that changed since the last scan."""
+        queued = 0
+        for path in discover_submissions(self.watch_root):
+            submission = str(path)
+            signature = submission_signature(submission)
+            if self._signatures.get(submission) == signature:
+                continue
+            self._signatures[submission] = signature
+            self.submit(submission)
+            queued += 1
+        self.metrics.scans.inc()
+        self.metrics.last_scan.set(time.time())
+        return queued
+
+    def _watch(self):
+        while not self._stopping.is_set():
+            try:
+                self.scan()
+            except (OSError, QueueFull) as e:
+                print(f"⚠️  Rescan of {self.watch_root} failed: {e}")
+            self._stopping.wait(self.scan_interval)
+
+    def health(self) -> Dict[str, Any]:
+        """Liveness details served on /health."""
+        pool_alive = self._pool is not None and not self._stopping.is_set()
+        return {
+            "status": "ok" if pool_alive else "stopping",
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "workers": self.workers,
+            "busy_workers": self.busy_workers,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "watching": self.watch_root
+        }
+
+
+class GradingRequestHandler(BaseHTTPRequestHandler):
+    """Serves the job API, /health and /metrics for the service attached to the server."""
+
+    server_version = "GradingService/1.0"
+
+    @property
+    def service(self) -> GradingService:
+        return self.server.service
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+
+        if url.path == "/health":
+            health = self.service.health()
+            self._send_json(200 if health["status"] == "ok" else 503, health)
+        elif url.path == "/metrics":
+            openmetrics = wants_openmetrics(self.headers.get("Accept"))
+            self._send(200, OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE,
+                       self.service.metrics.registry.render(openmetrics))
+        elif parts == ["jobs"]:
+            jobs = self.service.recent_jobs()
+            self._send_json(200, {"jobs": [job.to_dict(include_result=False) for job in jobs]})
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.get_job(parts[1])
+            if job is None:
+                self._send_json(404, {"error": f"Unknown job: {parts[1]}"})
+            elif len(parts) == 3 and parts[2] == "events":
+                self._stream_events(job)
+            elif len(parts) == 2:
+                self._send_job(job, self._wait_seconds(query))
+            else:
+                self._send_json(404, {"error": f"Not found: {url.path}"})
+        else:
+            self._send_json(404, {"error": f"Not found: {url.path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": f"Not found: {url.path}"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self._send_json(413, {"error": "Request body too large"})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            submission = self.service.resolve_submission(body["submission"])
+            job = self.service.submit(submission, body.get("tool", "check"), block=False)
+        except (ValueError, KeyError, TypeError) as e:
+            message = "Missing 'submission'" if isinstance(e, KeyError) else str(e)
+            self._send_json(400, {"error": message})
+            return
+        except QueueFull as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": "5"})
+            return
+
+        wait = self._wait_seconds(parse_qs(url.query), body.get("wait"))
+        self._send_job(job, wait, created=True)
+
+    @staticmethod
+    def _wait_seconds(query: Dict[str, List[str]], default: Any = None) -> float:
+        value = query.get("wait", [default])[0]
+        try:
+            return min(max(float(value or 0), 0.0), MAX_WAIT_SECONDS)
+        except ValueError:
+            return 0.0
+
+    def _send_job(self, job: GradingJob, wait: float, created: bool = False):
+        if wait and not job.finished:
+            job.wait(wait)
+        headers = {"Location": f"/jobs/{job.id}"} if created else None
+        # 202 tells pollers the job is still in progress
+        self._send_json(200 if job.finished else 202, job.to_dict(), headers)
+
+    def _stream_events(self, job: GradingJob):
+        """Send the job's status changes as server-sent events until it finishes."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        last_status = None
+        try:
+            while True:
+                with job.changed:
+                    if job.status == last_status and not job.finished:
+                        job.changed.wait(KEEPALIVE_SECONDS)
+                    status = job.status
+                if job.finished:
+                    self._write_event("result", job.to_dict())
+                    return
+                if status != last_status:
+                    self._write_event("status", job.to_dict(include_result=False))
+                    last_status = status
+                else:
+                    # Comment line so proxies keep an idle stream open
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_event(self, event: str, data: Dict[str, Any]):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        self._send(status, "application/json", json.dumps(data), headers)
+
+    def _send(self, status: int, content_type: str, body: str, headers: Optional[Dict[str, str]] = None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Scrapes and health checks every few seconds would flood the log
+        pass
+
+
+def serve(service: GradingService, host: str, port: int):
+    """Run the HTTP server until interrupted."""
+    server = ThreadingHTTPServer((host, port), GradingRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    # `docker stop` sends SIGTERM; finish running jobs instead of dying mid-write
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    service.start()
+    print(f"🚀 Grading service on http://{host}:{port} ({service.workers} workers)")
+    if service.watch_root:
+        print(f"👀 Watching {service.watch_root} every {service.scan_interval:g}s")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down...")
+    finally:
+        server.server_close()
+        service.stop()
+
+
+def main():
+    """Main function to run the grading service."""
+    parser = argparse.ArgumentParser(description="Run the grading service: an HTTP job API with /health and /metrics")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to listen on (default: 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", DEFAULT_PORT)),
+                        help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--workers", "-j", type=int,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument("--root", default=".",
+                        help="Directory that submitted paths are resolved against and must stay inside "
+                             "(default: current directory)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help=f"Jobs that can wait for a worker before POST /jobs returns 503 "
+                             f"(default: {DEFAULT_MAX_QUEUE})")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS,
+                        help=f"Finished jobs kept for polling (default: {DEFAULT_MAX_JOBS})")
+    parser.add_argument("--watch", metavar="ROOT",
+                        help="Re-check changed submissions under ROOT (e.g. student-submissions)")
+    parser.add_argument("--scan-interval", type=float, default=DEFAULT_SCAN_INTERVAL,
+                        help=f"Seconds between rescans of --watch (default: {DEFAULT_SCAN_INTERVAL:g})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Result cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Grade every submission from scratch")
+    args = parser.parse_args()
+
+    service = GradingService(
+        workers=args.workers,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        watch_root=args.watch,
+        scan_interval=args.scan_interval,
+        root=args.root,
+        max_queue=args.max_queue,
+        max_jobs=args.max_jobs
+    )
+    serve(service, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
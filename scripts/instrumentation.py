@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Grading Instrumentation
+
+Per-stage measurements for the checker, tester and feedback generator:
+wall and CPU time, child processes started and bytes read. Child processes
+are counted with an audit hook (`subprocess.Popen`, `os.fork`,
+`os.posix_spawn` and the sandbox's own `sandbox.run` event), and bytes
+read come from /proc/self/io where available. Submissions can also be run
+under cProfile, keeping the profiles of only the slowest few.
+"""
+
+import cProfile
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+PROCESS_EVENTS = {"subprocess.Popen", "os.fork", "os.forkpty", "os.posix_spawn", "os.spawn", "sandbox.run"}
+PROC_IO_PATH = "/proc/self/io"
+
+_processes_started = 0
+_hook_installed = False
+_read_overhead: Optional[int] = None
+
+
+def _audit_hook(event: str, args):
+    global _processes_started
+    if event in PROCESS_EVENTS:
+        _processes_started += 1
+
+
+def install_audit_hook():
+    """Start counting child processes; audit hooks cannot be removed, so this runs once."""
+    global _hook_installed
+    if not _hook_installed:
+        sys.addaudithook(_audit_hook)
+        _hook_installed = True
+
+
+def processes_started() -> int:
+    """Child processes started by this process since the hook was installed."""
+    return _processes_started
+
+
+def bytes_read() -> Optional[int]:
+    """Bytes this process has read so far (Linux `rchar`), or None if unavailable."""
+    try:
+        with open(PROC_IO_PATH, 'r') as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _probe_overhead() -> int:
+    """Bytes counted by reading /proc/self/io itself, subtracted from every stage."""
+    global _read_overhead
+    if _read_overhead is None:
+        first = bytes_read()
+        second = bytes_read()
+        _read_overhead = second - first if first is not None and second is not None else 0
+    return _read_overhead
+
+
+@dataclass
+class StageTiming:
+    """Resources used by one stage (summed if the stage ran more than once)."""
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    subprocesses: int = 0
+    bytes_read: Optional[int] = None
+
+
+class Instrumentation:
+    """Collects per-stage timings for one submission."""
+
+    def __init__(self):
+        install_audit_hook()
+        self.stages: Dict[str, StageTiming] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure the enclosed block as the named stage."""
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        start_processes = processes_started()
+        start_read = bytes_read()
+        try:
+            yield
+        finally:
+            timing = self.stages.setdefault(name, StageTiming())
+            timing.wall_seconds += time.perf_counter() - start_wall
+            timing.cpu_seconds += time.process_time() - start_cpu
+            timing.subprocesses += processes_started() - start_processes
+            end_read = bytes_read()
+            if start_read is not None and end_read is not None:
+                read = max(end_read - start_read - _probe_overhead(), 0)
+                timing.bytes_read = (timing.bytes_read or 0) + read
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(timing.wall_seconds for timing in self.stages.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        stages = {}
+        for name, timing in self.stages.items():
+            stage = asdict(timing)
+            stage["wall_seconds"] = round(timing.wall_seconds, 4)
+            stage["cpu_seconds"] = round(timing.cpu_seconds, 4)
+            stages[name] = stage
+
+        read_values = [timing.bytes_read for timing in self.stages.values() if timing.bytes_read is not None]
+        return {
+            "stages": stages,
+            "total": {
+                "wall_seconds": round(self.total_seconds, 4),
+                "cpu_seconds": round(sum(t.cpu_seconds for t in self.stages.values()), 4),
+                "subprocesses": sum(t.subprocesses for t in self.stages.values()),
+                "bytes_read": sum(read_values) if read_values else None
+            }
+        }
+
+
+def profile_path_for(profile_dir: str, submission_path: str) -> Path:
+    """Where the profile of a submission is written."""
+    name = re.sub(r"[^A-Za-z0-9._-]+", "__", os.path.normpath(submission_path)).strip("_")
+    return Path(profile_dir) / f"{name or 'submission'}.prof"
+
+
+def profile_call(func: Callable[..., Any], *args, profile_path: Optional[Path] = None, **kwargs) -> Any:
+    """Call func, writing pstats data to profile_path when one is given."""
+    if profile_path is None:
+        return func(*args, **kwargs)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile_path))
+
+
+def keep_slowest_profiles(profile_dir: str, durations: Dict[str, float], keep: int) -> Dict[str, str]:
+    """Delete all but the `keep` slowest submissions' profiles.
+
+    durations maps submission paths to their total wall time. Returns the
+    kept submissions mapped to their profile files.
+    """
+    ranked = sorted(durations, key=durations.get, reverse=True)
+    kept = {}
+    for index, submission in enumerate(ranked):
+        path = profile_path_for(profile_dir, submission)
+        if index < keep:
+            if path.exists():
+                kept[submission] = str(path)
+        elif path.exists():
+            path.unlink()
+    return kept
+
+
+def aggregate_timings(results) -> Dict[str, Dict[str, float]]:
+    """Sum each stage's wall and CPU time over many submission results."""
+    totals: Dict[str, Dict[str, float]] = {}
+    for result in results:
+        for name, stage in result.get("timings", {}).get("stages", {}).items():
+            total = totals.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "subprocesses": 0})
+            total["wall_seconds"] += stage["wall_seconds"]
+            total["cpu_seconds"] += stage["cpu_seconds"]
+            total["subprocesses"] += stage["subprocesses"]
+    for total in totals.values():
+        total["wall_seconds"] = round(total["wall_seconds"], 3)
+        total["cpu_seconds"] = round(total["cpu_seconds"], 3)
+    return dict(sorted(totals.items(), key=lambda item: -item[1]["wall_seconds"]))
+
+
+def prune_profiles(profile_dir: str, results, keep: int) -> Dict[str, str]:
+    """Keep the profiles of the `keep` slowest submissions in a batch."""
+    durations = {
+        result["submission"]: result.get("timings", {}).get("total", {}).get("wall_seconds", 0.0)
+        for result in results if "submission" in result
+    }
+    return keep_slowest_profiles(profile_dir, durations, keep)
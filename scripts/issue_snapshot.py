@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Issue Snapshot
+
+One fetch of a repository's open issues, indexed in memory by assignee.
+The task scripts ask several questions per run ("who has how much work",
+"what is unassigned"); answering them all from one snapshot avoids paging
+through the full issue list for each one.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+
+@dataclass
+class IssueRecord:
+    """The fields of an issue (or pull request) the task scripts use."""
+    number: int
+    title: str
+    body: str = ""
+    labels: List[str] = field(default_factory=list)
+    assignees: List[str] = field(default_factory=list)
+    milestone: Optional[str] = None
+    is_pull_request: bool = False
+    id: Optional[int] = None
+    node_id: Optional[str] = None
+
+
+class IssueSnapshot:
+    """Open issues fetched once, indexed by assignee."""
+
+    def __init__(self, issues: Iterable[IssueRecord]):
+        self.issues = list(issues)
+        self._by_assignee: Dict[str, List[IssueRecord]] = defaultdict(list)
+        for issue in self.issues:
+            for login in issue.assignees:
+                self._by_assignee[login].append(issue)
+
+    def __len__(self) -> int:
+        return len(self.issues)
+
+    def unassigned(self) -> List[IssueRecord]:
+        """Issues (not pull requests) nobody is assigned to."""
+        return [issue for issue in self.issues if not issue.assignees and not issue.is_pull_request]
+
+    def workload(self) -> Dict[str, int]:
+        """Open issues and pull requests per assignee."""
+        return {login: len(issues) for login, issues in self._by_assignee.items()}
+
+    def record_assignment(self, issue: IssueRecord, login: str):
+        """Reflect an assignment made during the run in the indexes."""
+        if login not in issue.assignees:
+            issue.assignees.append(login)
+            self._by_assignee[login].append(issue)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Report Rendering
+
+One rendering layer for the checker, tester and feedback reports. Templates
+are parsed once at import time into literal and field parts, and every
+report is rendered by appending those parts to a list that is joined once
+at the end, so rendering a whole cohort costs almost nothing. The same
+result object can be rendered as console text, markdown, JSON or HTML.
+"""
+
+import html
+import json
+import string
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+RENDER_FORMATS = ("text", "markdown", "json", "html")
+REPORT_KINDS = ("check", "test", "feedback")
+
+RULE = "=" * 50
+
+_FORMATTER = string.Formatter()
+
+# (heading, lines) pairs making up a report, used by the generic renderers
+Sections = List[Tuple[str, List[str]]]
+
+
+class Template:
+    """A str.format-style template compiled once into literal and field parts.
+
+    Fields must be plain names, optionally with a format spec
+    (e.g. `{score}` or `{ratio:.0%}`). When `escape` is given it is applied
+    to every field value, never to the template's own text.
+    """
+
+    def __init__(self, text: str, escape: Optional[Callable[[str], str]] = None):
+        self.escape = escape
+        self.parts: List[Tuple[str, Optional[str], str]] = []
+        for literal, field, spec, conversion in _FORMATTER.parse(text):
+            if literal:
+                self.parts.append((literal, None, ""))
+            if field is not None:
+                if not field.isidentifier() or conversion:
+                    raise ValueError(f"Unsupported template field: {{{field}}}")
+                self.parts.append(("", field, spec or ""))
+
+    def render_into(self, out: List[str], context: Dict[str, Any]):
+        """Append the rendered template to out."""
+        escape = self.escape
+        for literal, field, spec in self.parts:
+            if field is None:
+                out.append(literal)
+                continue
+            value = format(context[field], spec) if spec else str(context[field])
+            out.append(escape(value) if escape else value)
+
+    def render(self, **context) -> str:
+        out: List[str] = []
+        self.render_into(out, context)
+        return "".join(out)
+
+
+def _html_template(text: str) -> Template:
+    return Template(text, escape=html.escape)
+
+
+# Console text reports
+
+CHECK_TEXT_HEADER = Template("\n" + RULE + "\n📊 SUBMISSION CHECK REPORT\n" + RULE + "\n{status_line}")
+CHECK_TEXT_SUMMARY = Template(
+    "\n\n📈 Summary:\n"
+    "  • Total Errors: {total_errors}\n"
+    "  • Total Warnings: {total_warnings}\n"
+    "  • Status: {status}"
+)
+
+TEST_TEXT_HEADER = Template(
+    "\n" + RULE + "\n📊 TEST RESULTS REPORT\n" + RULE + "\n{status_line}\n"
+    "\n📈 Summary:\n"
+    "  • Total Tests: {total_tests}\n"
+    "  • Passed: {passed_tests}\n"
+    "  • Failed: {failed_tests}\n"
+    "\n🔍 Detailed Results:"
+)
+TEST_TEXT_RESULT = Template("\n  • {name}: {status}")
+
+BULLET_LINE = Template("\n  • {item}")
+
+# Feedback markdown
+
+FEEDBACK_MARKDOWN = Template("""# Automated Feedback Report
+
+## 📊 Overall Score: {total_score}/100
+
+### 📁 Structure Analysis ({structure_score}/70)
+{structure_feedback}
+
+### 🎯 Code Quality ({quality_score}/45)
+{quality_feedback}
+
+### ⚙️ Functionality ({functionality_score}/20)
+{functionality_feedback}
+
+## 🏆 Grade Breakdown
+- **Structure**: {structure_score}/70 points
+- **Code Quality**: {quality_score}/45 points  
+- **Functionality**: {functionality_score}/20 points
+- **Total**: {total_score}/135 points (scaled to 100)
+
+## 📝 Recommendations
+
+### What you did well:
+{positive_points}
+
+### Areas for improvement:
+{improvements}
+
+## 🔍 Detailed Issues
+{issues}
+
+---
+*This feedback was generated automatically. Please review and address the suggestions above.*
+""")
+
+# Generic markdown and HTML, built from a report's sections
+
+MARKDOWN_HEADER = Template("# {title}\n\n**{status}**\n")
+MARKDOWN_SECTION = Template("\n## {heading}\n")
+MARKDOWN_ITEM = Template("- {item}\n")
+
+HTML_HEADER = _html_template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+<h1>{title}</h1>
+<p><strong>{status}</strong></p>
+""")
+HTML_SECTION_START = _html_template("<h2>{heading}</h2>\n<ul>\n")
+HTML_ITEM = _html_template("<li>{item}</li>\n")
+HTML_SECTION_END = Template("</ul>\n")
+HTML_FOOTER = Template("</body>\n</html>\n")
+
+
+def _markdown_list(items: Sequence[str], empty: str) -> str:
+    return "\n".join(f"- {item}" for item in items) if items else f"- {empty}"
+
+
+# Check reports
+
+def _check_text(report: Dict[str, Any]) -> str:
+    errors = report.get("errors", [])
+    warnings = report.get("warnings", [])
+    out: List[str] = []
+    CHECK_TEXT_HEADER.render_into(out, {
+        "status_line": "✅ Submission check PASSED" if report["passed"] else "❌ Submission check FAILED"
+    })
+    if errors:
+        out.append(f"\n\n❌ Errors ({len(errors)}):")
+        for error in errors:
+            BULLET_LINE.render_into(out, {"item": error})
+    if warnings:
+        out.append(f"\n\n⚠️  Warnings ({len(warnings)}):")
+        for warning in warnings:
+            BULLET_LINE.render_into(out, {"item": warning})
+    CHECK_TEXT_SUMMARY.render_into(out, {
+        "total_errors": len(errors),
+        "total_warnings": len(warnings),
+        "status": report["summary"]["status"]
+    })
+    return "".join(out)
+
+
+def _check_sections(report: Dict[str, Any]) -> Tuple[str, str, Sections]:
+    summary = report["summary"]
+    sections = [
+        ("Errors", list(report.get("errors", []))),
+        ("Warnings", list(report.get("warnings", []))),
+        ("Summary", [
+            f"Total Errors: {summary['total_errors']}",
+            f"Total Warnings: {summary['total_warnings']}",
+            f"Status: {summary['status']}"
+        ])
+    ]
+    return "Submission Check Report", summary["status"], sections
+
+
+# Test reports
+
+def _test_text(report: Dict[str, Any]) -> str:
+    summary = report.get("summary", {})
+    out: List[str] = []
+    TEST_TEXT_HEADER.render_into(out, {
+        "status_line": "✅ All tests PASSED" if report["passed"] else "❌ Some tests FAILED",
+        "total_tests": summary.get("total_tests", 0),
+        "passed_tests": summary.get("passed_tests", 0),
+        "failed_tests": summary.get("failed_tests", 0)
+    })
+    for test_name, result in report.get("test_results", {}).items():
+        TEST_TEXT_RESULT.render_into(out, {
+            "name": test_name.title(),
+            "status": "✅ PASS" if result.get("passed", True) else "❌ FAIL"
+        })
+        for error in (result.get("errors") or [])[:3]:  # Show first 3 errors
+            out.append(f"\n    - {error}")
+        for warning in (result.get("warnings") or [])[:3]:  # Show first 3 warnings
+            out.append(f"\n    ⚠️  {warning}")
+    if "error" in report:
+        out.append(f"\n  • Error: {report['error']}")
+    return "".join(out)
+
+
+def _test_sections(report: Dict[str, Any]) -> Tuple[str, str, Sections]:
+    summary = report.get("summary", {})
+    sections = [("Summary", [
+        f"Total Tests: {summary.get('total_tests', 0)}",
+        f"Passed: {summary.get('passed_tests', 0)}",
+        f"Failed: {summary.get('failed_tests', 0)}"
+    ])]
+    for test_name, result in report.get("test_results", {}).items():
+        status = "PASS" if result.get("passed", True) else "FAIL"
+        items = [f"Error: {error}" for error in result.get("errors") or []]
+        items += [f"Warning: {warning}" for warning in result.get("warnings") or []]
+        sections.append((f"{test_name.title()}: {status}", items))
+    if "error" in report:
+        sections.append(("Error", [report["error"]]))
+    return "Test Results Report", "PASS" if report["passed"] else "FAIL", sections
+
+
+# Feedback reports
+
+def _feedback_markdown(result: Dict[str, Any]) -> str:
+    structure = result["structure"]
+    quality = result["quality"]
+    functionality = result["functionality"]
+    return FEEDBACK_MARKDOWN.render(
+        total_score=result["total_score"],
+        structure_score=structure["structure_score"],
+        quality_score=quality["quality_score"],
+        functionality_score=functionality["functionality_score"],
+        structure_feedback="\n".join(structure["feedback"]),
+        quality_feedback="\n".join(quality["feedback"]),
+        functionality_feedback="\n".join(functionality["feedback"]),
+        positive_points=_markdown_list(result["positive_points"], "Keep working on the basics!"),
+        improvements=_markdown_list(result["improvements"], "Great job! Keep up the excellent work!"),
+        issues=_markdown_list(quality["issues"], "No major issues found!")
+    )
+
+
+def _feedback_sections(result: Dict[str, Any]) -> Tuple[str, str, Sections]:
+    structure = result["structure"]
+    quality = result["quality"]
+    functionality = result["functionality"]
+    sections = [
+        (f"Structure Analysis ({structure['structure_score']}/70)", structure["feedback"]),
+        (f"Code Quality ({quality['quality_score']}/45)", quality["feedback"]),
+        (f"Functionality ({functionality['functionality_score']}/20)", functionality["feedback"]),
+        ("What you did well", result["positive_points"] or ["Keep working on the basics!"]),
+        ("Areas for improvement", result["improvements"] or ["Great job! Keep up the excellent work!"]),
+        ("Detailed Issues", quality["issues"] or ["No major issues found!"])
+    ]
+    return "Automated Feedback Report", f"Overall Score: {result['total_score']}/100", sections
+
+
+_TEXT_RENDERERS = {"check": _check_text, "test": _test_text, "feedback": _feedback_markdown}
+_MARKDOWN_RENDERERS = {"feedback": _feedback_markdown}
+_SECTION_BUILDERS = {"check": _check_sections, "test": _test_sections, "feedback": _feedback_sections}
+
+
+def _render_markdown(title: str, status: str, sections: Sections) -> str:
+    out: List[str] = []
+    MARKDOWN_HEADER.render_into(out, {"title": title, "status": status})
+    for heading, items in sections:
+        MARKDOWN_SECTION.render_into(out, {"heading": heading})
+        for item in items:
+            MARKDOWN_ITEM.render_into(out, {"item": item})
+    return "".join(out)
+
+
+def _render_html(title: str, status: str, sections: Sections) -> str:
+    out: List[str] = []
+    HTML_HEADER.render_into(out, {"title": title, "status": status})
+    for heading, items in sections:
+        HTML_SECTION_START.render_into(out, {"heading": heading})
+        for item in items:
+            HTML_ITEM.render_into(out, {"item": item})
+        HTML_SECTION_END.render_into(out, {})
+    HTML_FOOTER.render_into(out, {})
+    return "".join(out)
+
+
+def render_report(kind: str, result: Dict[str, Any], fmt: str = "text") -> str:
+    """Render a check, test or feedback result in the requested format."""
+    if kind not in REPORT_KINDS:
+        raise ValueError(f"Unknown report kind: {kind}")
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"Unknown report format: {fmt}")
+
+    if fmt == "json":
+        return json.dumps(result, indent=2)
+    if fmt == "text":
+        return _TEXT_RENDERERS[kind](result)
+    if fmt == "markdown" and kind in _MARKDOWN_RENDERERS:
+        return _MARKDOWN_RENDERERS[kind](result)
+
+    title, status, sections = _SECTION_BUILDERS[kind](result)
+    if fmt == "markdown":
+        return _render_markdown(title, status, sections)
+    return _render_html(title, status, sections)
+
+
+def format_for_path(path: str, default: str = "json") -> str:
+    """Pick a render format from an output file's extension."""
+    lowered = path.lower()
+    if lowered.endswith((".html", ".htm")):
+        return "html"
+    if lowered.endswith((".md", ".markdown")):
+        return "markdown"
+    if lowered.endswith(".txt"):
+        return "text"
+    if lowered.endswith(".json"):
+        return "json"
+    return default
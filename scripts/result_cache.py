@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Submission Result Cache
+
+On-disk cache for grading results, keyed by a hash of a submission's file
+contents plus the version of the tool that produced the result. Unchanged
+submissions are served from the cache instead of being re-checked.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from file_walker import walk_files
+
+
+DEFAULT_CACHE_DIR = os.getenv("GRADING_CACHE_DIR", ".grading-cache")
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file(digest, path: str):
+    # Streamed in chunks, so memory stays flat however large the file is
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+
+def hash_submission(submission_path: str) -> str:
+    """Hash the relative paths and contents of every file in a submission."""
+    digest = hashlib.sha256()
+    skipped = []
+
+    for entry in walk_files(submission_path, use_gitignore=False, skipped=skipped, include_symlinks=True):
+        digest.update(entry.relpath.encode('utf-8'))
+        digest.update(b"\0")
+        try:
+            if entry.is_symlink:
+                # Staging copies the link itself, so its target is what matters
+                digest.update(f"symlink:{os.readlink(entry.path)}".encode('utf-8', 'surrogateescape'))
+            else:
+                _hash_file(digest, entry.path)
+        except OSError as e:
+            digest.update(f"unreadable:{e.errno}".encode('utf-8'))
+        digest.update(b"\0")
+
+    # Committed virtualenvs and caches are not hashed, but their presence is reported
+    for relpath in skipped:
+        digest.update(f"skipped:{relpath}\0".encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of grading results stored as JSON files."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, namespace: str = "default",
+                 version: str = "1", max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) / "results"
+        self.namespace = namespace
+        self.version = version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, submission_path: str) -> str:
+        """Cache key for the current contents of a submission."""
+        tool = hashlib.sha256(f"{self.namespace}:{self.version}".encode('utf-8')).hexdigest()
+        return f"{self.namespace}-{tool[:12]}-{hash_submission(submission_path)}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss."""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Bump the modification time so eviction is least-recently-used
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a result atomically and evict old entries if over budget."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """Remove least-recently-used entries until within the size limits."""
+        entries = []
+        total_bytes = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(".json"):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total_bytes += stat.st_size
+        except OSError:
+            return
+
+        if len(entries) <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+
+        entries.sort()
+        count = len(entries)
+        for _, size, path in entries:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            count -= 1
+            total_bytes -= size
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
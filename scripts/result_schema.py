@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Submission Result Schema
+
+Typed records for the results produced by check_submission.py,
+test_submission.py and generate_feedback.py, so every tool reports one
+row per submission per run in the same shape. The full tool report is
+kept alongside as JSON for anyone who needs the details.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# __slots__ keep per-row memory down when holding a whole cohort; the
+# dataclass option only exists on Python 3.10+
+DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+WEEK_PATTERN = re.compile(r"^week-(\d+)$")
+
+TOOLS = ("check_submission", "test_submission", "generate_feedback")
+
+
+def new_run_id() -> str:
+    """A sortable identifier for one invocation of a grading tool."""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+@lru_cache(maxsize=256)
+def _checkout_root(directory: str) -> Optional[str]:
+    """The nearest enclosing directory with a .git entry, if any."""
+    while True:
+        if os.path.exists(os.path.join(directory, ".git")):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def submission_key(submission: str) -> str:
+    """The stored form of a submission path.
+
+    "alice/week-01", "./alice/week-01/" and the absolute path all name the
+    same submission, so rows are keyed by the normalized path relative to
+    the repository checkout (or the absolute path outside one).
+    """
+    path = os.path.abspath(submission)
+    root = _checkout_root(os.path.dirname(path))
+    if root is not None:
+        path = os.path.relpath(path, root)
+    return path.replace(os.sep, "/")
+
+
+def parse_submission_path(submission: str) -> Tuple[str, Optional[int]]:
+    """Return (student, week number) for a `<username>/week-XX` path."""
+    path = Path(submission)
+    match = WEEK_PATTERN.match(path.name)
+    if not match:
+        return path.name, None
+    return path.parent.name, int(match.group(1))
+
+
+@dataclass(**DATACLASS_OPTIONS)
+class SubmissionResult:
+    """One tool's result for one submission in one run."""
+    run_id: str
+    tool: str
+    submission: str
+    student: str
+    week: Optional[int]
+    passed: bool
+    score: Optional[float] = None
+    errors: int = 0
+    warnings: int = 0
+    created_at: float = field(default_factory=time.time)
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def to_row(self) -> Dict[str, Any]:
+        """Flat column values, with details serialized to JSON."""
+        row = asdict(self)
+        row["passed"] = int(self.passed)
+        row["details"] = json.dumps(self.details)
+        return row
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "SubmissionResult":
+        values = dict(row)
+        values["passed"] = bool(values["passed"])
+        values["details"] = json.loads(values["details"]) if values.get("details") else {}
+        return cls(**values)
+
+
+COLUMNS: List[str] = [f.name for f in fields(SubmissionResult)]
+
+
+def _result(tool: str, submission: str, run_id: str, passed: bool, **values) -> SubmissionResult:
+    key = submission_key(str(submission))
+    student, week = parse_submission_path(key)
+    return SubmissionResult(run_id=run_id, tool=tool, submission=key,
+                            student=student, week=week, passed=passed, **values)
+
+
+def from_check_report(report: Dict[str, Any], submission: str, run_id: str) -> SubmissionResult:
+    """Row for a check_submission.py report."""
+    return _result("check_submission", submission, run_id, bool(report.get("passed")),
+                   errors=len(report.get("errors", [])),
+                   warnings=len(report.get("warnings", [])),
+                   details=report)
+
+
+def from_test_report(report: Dict[str, Any], submission: str, run_id: str) -> SubmissionResult:
+    """Row for a test_submission.py report; the score is the share of tests passed."""
+    summary = report.get("summary", {})
+    total = summary.get("total_tests", 0)
+    test_results = report.get("test_results", {}).values()
+    return _result("test_submission", submission, run_id, bool(report.get("passed")),
+                   score=round(summary.get("passed_tests", 0) / total * 100, 1) if total else None,
+                   errors=sum(len(r.get("errors") or []) for r in test_results)
+                   + (1 if "error" in report else 0),
+                   warnings=sum(len(r.get("warnings") or []) for r in test_results),
+                   details=report)
+
+
+def from_feedback_result(result: Dict[str, Any], submission: str, run_id: str) -> SubmissionResult:
+    """Row for a generate_feedback.py result; the score is the overall feedback score."""
+    return _result("generate_feedback", submission, run_id, True,
+                   score=result.get("total_score"),
+                   warnings=len(result.get("improvements", [])),
+                   details=result)
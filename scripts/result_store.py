@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Cohort Result Store
+
+A local SQLite database holding one row per submission per tool run, so
+cohort statistics (pass rates per week, score distributions) are a query
+away instead of a walk over hundreds of JSON reports. Rows can also be
+exported to Parquet when pyarrow is installed.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from result_cache import DEFAULT_CACHE_DIR
+from result_schema import COLUMNS, TOOLS, SubmissionResult
+
+
+DEFAULT_STORE_PATH = os.getenv("GRADING_STORE", os.path.join(DEFAULT_CACHE_DIR, "results.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    submission TEXT NOT NULL,
+    student TEXT NOT NULL,
+    week INTEGER,
+    passed INTEGER NOT NULL,
+    score REAL,
+    errors INTEGER NOT NULL DEFAULT 0,
+    warnings INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS results_tool_week ON results (tool, week);
+CREATE INDEX IF NOT EXISTS results_tool_submission ON results (tool, submission, created_at);
+"""
+
+# Most recent row per submission for one tool
+LATEST = """
+SELECT r.* FROM results r
+JOIN (
+    SELECT submission, MAX(created_at) AS created_at
+    FROM results WHERE tool = ? GROUP BY submission
+) latest USING (submission, created_at)
+WHERE r.tool = ?
+"""
+
+
+class ResultStore:
+    """Append-only table of submission results with cohort query helpers."""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, results: Iterable[SubmissionResult]) -> int:
+        """Insert results in a single transaction and return how many were added."""
+        rows = [result.to_row() for result in results]
+        placeholders = ", ".join(f":{column}" for column in COLUMNS)
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({placeholders})", rows
+            )
+        return len(rows)
+
+    def latest(self, tool: str) -> List[SubmissionResult]:
+        """The most recent result of a tool for every submission."""
+        cursor = self.connection.execute(LATEST + " ORDER BY r.submission", (tool, tool))
+        return [SubmissionResult.from_row(dict(row)) for row in cursor]
+
+    def pass_rates_by_week(self, tool: str) -> List[Dict[str, Any]]:
+        """Submissions, passes and pass rate per week, from each submission's latest result."""
+        cursor = self.connection.execute(f"""
+            SELECT week, COUNT(*) AS submissions, SUM(passed) AS passed,
+                   ROUND(AVG(passed), 3) AS pass_rate
+            FROM ({LATEST}) GROUP BY week ORDER BY week
+        """, (tool, tool))
+        return [dict(row) for row in cursor]
+
+    def score_distribution(self, tool: str, week: Optional[int] = None,
+                           bucket_size: int = 10) -> List[Dict[str, Any]]:
+        """Histogram of latest scores in buckets of bucket_size points."""
+        query = f"""
+            SELECT CAST(score / ? AS INTEGER) * ? AS bucket, COUNT(*) AS submissions
+            FROM ({LATEST}) WHERE score IS NOT NULL
+        """
+        params: List[Any] = [bucket_size, bucket_size, tool, tool]
+        if week is not None:
+            query += " AND week = ?"
+            params.append(week)
+        cursor = self.connection.execute(query + " GROUP BY bucket ORDER BY bucket", params)
+        return [dict(row) for row in cursor]
+
+    def export_parquet(self, output: str, tool: Optional[str] = None) -> int:
+        """Write every stored row (optionally one tool's) to a Parquet file."""
+        if pyarrow is None:
+            raise ImportError("pyarrow is not installed. Run: pip install pyarrow")
+
+        query = f"SELECT {', '.join(COLUMNS)} FROM results"
+        params: List[Any] = []
+        if tool:
+            query += " WHERE tool = ?"
+            params.append(tool)
+        rows = [dict(row) for row in self.connection.execute(query + " ORDER BY created_at", params)]
+
+        columns = {column: [row[column] for row in rows] for column in COLUMNS}
+        columns["passed"] = [bool(value) for value in columns["passed"]]
+        pyarrow.parquet.write_table(pyarrow.table(columns), output)
+        return len(rows)
+
+
+def store_results(path: str, results: Iterable[SubmissionResult]) -> int:
+    """Append results to the store at path."""
+    with ResultStore(path) as store:
+        return store.append(results)
+
+
+def main():
+    """Main function to query the cohort result store."""
+    parser = argparse.ArgumentParser(description="Query the cohort result store")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH,
+                        help=f"SQLite result store (default: {DEFAULT_STORE_PATH})")
+    parser.add_argument("--tool", choices=TOOLS,
+                        help="Which tool's results to use (default: check_submission for statistics, "
+                             "every tool for exports)")
+    parser.add_argument("--week", type=int, help="Limit the score distribution to one week")
+    parser.add_argument("--json", action="store_true", help="Print statistics as JSON")
+    parser.add_argument("--export-parquet", metavar="PATH",
+                        help="Export stored rows to a Parquet file (requires pyarrow)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store):
+        print(f"Error: Result store not found: {args.store}")
+        sys.exit(1)
+
+    with ResultStore(args.store) as store:
+        if args.export_parquet:
+            try:
+                count = store.export_parquet(args.export_parquet, args.tool)
+            except ImportError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+            print(f"📦 Exported {count} rows to {args.export_parquet}")
+            return
+
+        tool = args.tool or "check_submission"
+        stats = {
+            "tool": tool,
+            "pass_rates_by_week": store.pass_rates_by_week(tool),
+            "score_distribution": store.score_distribution(tool, args.week)
+        }
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return
+
+    print(f"📊 {stats['tool']} results")
+    print("\n📅 Pass rate per week:")
+    for row in stats["pass_rates_by_week"]:
+        week = f"week-{row['week']:02d}" if row["week"] is not None else "other"
+        print(f"  • {week}: {row['passed']}/{row['submissions']} ({row['pass_rate']:.0%})")
+    if stats["score_distribution"]:
+        print("\n📈 Score distribution:")
+        for row in stats["score_distribution"]:
+            print(f"  • {row['bucket']:>3}+: {row['submissions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Submission Sandbox Pool
+
+Runs student scripts in isolated worker processes forked from a pre-warmed
+fork server. The fork server imports common course dependencies once, so
+each job starts in milliseconds instead of paying interpreter startup and
+heavy imports. Every job gets a fresh process (recycled after one run)
+with CPU-time, memory and wall-clock limits.
+
+Job processes are not daemonic, so scripts may start processes of their
+own (e.g. a multiprocessing.Pool); each job runs in its own session and
+the whole process group is killed when the job ends or times out.
+
+Jobs with extra_paths (a per-submission dependency environment) start from
+a plain spawned interpreter instead: modules preloaded into the fork server
+would otherwise shadow the versions pinned in that environment.
+"""
+
+import gc
+import multiprocessing
+import os
+import runpy
+import signal
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# Imported once by the fork server; modules that are not installed are skipped
+DEFAULT_PRELOAD = ["numpy", "pandas", "requests", "langchain", "openai", "dotenv"]
+
+DEFAULT_TIMEOUT = 30  # wall-clock seconds
+DEFAULT_CPU_SECONDS = 30
+DEFAULT_MEMORY_MB = 2048
+OUTPUT_LIMIT = 64 * 1024  # characters of stdout/stderr kept per job
+
+
+@dataclass
+class SandboxJob:
+    """A script to run inside the sandbox."""
+    script: str
+    cwd: str
+    run_name: str = "__main__"
+    timeout: float = DEFAULT_TIMEOUT
+    cpu_seconds: int = DEFAULT_CPU_SECONDS
+    memory_mb: int = DEFAULT_MEMORY_MB
+    extra_paths: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SandboxResult:
+    """Outcome of a sandboxed run."""
+    script: str
+    returncode: Optional[int]
+    stdout: str = ""
+    stderr: str = ""
+    timed_out: bool = False
+    duration: float = 0.0
+    exec_seconds: Optional[float] = None
+    peak_rss_kb: Optional[int] = None
+
+    @property
+    def passed(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _apply_limits(job: SandboxJob):
+    """Apply per-job resource limits in the child process."""
+    if resource is None:
+        return
+    if job.cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (job.cpu_seconds, job.cpu_seconds + 1))
+    if job.memory_mb:
+        limit = job.memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+
+def _run_job(job: SandboxJob, stdout_path: str, stderr_path: str, conn):
+    """Child process entry point: run the script and report back over conn."""
+    # Send the script's output to files the parent reads afterwards
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for path, fd in ((stdout_path, 1), (stderr_path, 2)):
+        target = os.open(path, os.O_WRONLY | os.O_TRUNC)
+        os.dup2(target, fd)
+        os.close(target)
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+
+    # Lead a process group, so anything the script starts can be killed with it
+    if hasattr(os, "setsid"):
+        os.setsid()
+
+    os.chdir(job.cwd)
+    sys.path[:0] = [job.cwd] + list(job.extra_paths)
+    sys.argv = [job.script]
+    _apply_limits(job)
+
+    returncode = 0
+    start = time.perf_counter()
+    try:
+        runpy.run_path(job.script, run_name=job.run_name)
+    except SystemExit as e:
+        if e.code is None:
+            returncode = 0
+        elif isinstance(e.code, int):
+            returncode = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            returncode = 1
+    except BaseException as e:
+        # Hide the sandbox and runpy frames, like a plain `python script.py`
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != job.script:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        returncode = 1
+    exec_seconds = time.perf_counter() - start
+    # os._exit skips finalizers; release what the script's own pools registered
+    gc.collect()
+
+    peak_rss_kb = None
+    if resource is not None:
+        peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except Exception:
+        pass
+    conn.send({
+        "returncode": returncode,
+        "exec_seconds": round(exec_seconds, 4),
+        "peak_rss_kb": peak_rss_kb
+    })
+    conn.close()
+    os._exit(0)
+
+
+def _read_output(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read(OUTPUT_LIMIT)
+
+
+def _kill_process_group(pid: int):
+    """Kill whatever the job's script started and left running."""
+    if not hasattr(os, "killpg"):
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+class SandboxPool:
+    """Runs sandbox jobs concurrently in processes forked from a warm fork server."""
+
+    def __init__(self, max_workers: Optional[int] = None, preload: Sequence[str] = DEFAULT_PRELOAD):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        methods = multiprocessing.get_all_start_methods()
+        method = "forkserver" if "forkserver" in methods else "spawn"
+        self.context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            self.context.set_forkserver_preload(list(preload))
+        # No preloaded modules, so extra_paths take precedence on import
+        self.clean_context = multiprocessing.get_context("spawn")
+
+    def run(self, job: SandboxJob) -> SandboxResult:
+        """Run a single job and wait for it to finish or hit its limits."""
+        with tempfile.TemporaryDirectory(prefix="sandbox-") as tmp:
+            stdout_path = os.path.join(tmp, "stdout")
+            stderr_path = os.path.join(tmp, "stderr")
+            open(stdout_path, 'w').close()
+            open(stderr_path, 'w').close()
+
+            context = self.clean_context if job.extra_paths else self.context
+            parent_conn, child_conn = context.Pipe(duplex=False)
+            # Not daemonic: daemonic processes may not have children of their own
+            process = context.Process(
+                target=_run_job, args=(job, stdout_path, stderr_path, child_conn)
+            )
+
+            # Lets instrumentation count sandbox runs as child processes
+            sys.audit("sandbox.run", job.script)
+            start = time.perf_counter()
+            process.start()
+            child_conn.close()
+            process.join(job.timeout)
+            timed_out = process.is_alive()
+            # The job (if still running) and anything its script left behind
+            _kill_process_group(process.pid)
+            if timed_out:
+                process.kill()
+                process.join()
+            duration = time.perf_counter() - start
+
+            report = {}
+            if parent_conn.poll():
+                try:
+                    report = parent_conn.recv()
+                except (EOFError, OSError):
+                    report = {}
+            parent_conn.close()
+
+            if timed_out:
+                returncode = None
+            elif "returncode" in report:
+                returncode = report["returncode"]
+            else:
+                # Killed by a signal, e.g. SIGXCPU or SIGKILL after exceeding limits
+                returncode = process.exitcode
+
+            return SandboxResult(
+                script=job.script,
+                returncode=returncode,
+                stdout=_read_output(stdout_path),
+                stderr=_read_output(stderr_path),
+                timed_out=timed_out,
+                duration=round(duration, 4),
+                exec_seconds=report.get("exec_seconds"),
+                peak_rss_kb=report.get("peak_rss_kb")
+            )
+
+    def run_many(self, jobs: Sequence[SandboxJob]) -> List[SandboxResult]:
+        """Run jobs concurrently, at most max_workers at a time, in input order."""
+        if len(jobs) <= 1 or self.max_workers <= 1:
+            return [self.run(job) for job in jobs]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as executor:
+            return list(executor.map(self.run, jobs))
+
+
+_SANDBOX_POOL: Optional[SandboxPool] = None
+
+
+def get_sandbox_pool() -> SandboxPool:
+    """Return this process's sandbox pool, creating it on first use."""
+    global _SANDBOX_POOL
+    if _SANDBOX_POOL is None:
+        _SANDBOX_POOL = SandboxPool()
+    return _SANDBOX_POOL
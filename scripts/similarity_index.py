@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Cohort Similarity Index
+
+Finds near-duplicate Python files across the whole cohort. Every `.py` file
+is reduced to shingles of normalized tokens (identifiers, literals and
+comments abstracted away, so renaming variables does not hide a copy),
+summarized as a MinHash signature and bucketed with locality-sensitive
+hashing. Only files that share a bucket are compared, so reporting stays
+far below quadratic as the cohort grows. The index is persisted and
+updated incrementally: unchanged files are not re-read. Files too small to
+index are recorded as stubs (size and mtime, no signature), so they are
+skipped on later runs too.
+"""
+
+import argparse
+import builtins
+import hashlib
+import io
+import json
+import keyword
+import os
+import random
+import sys
+import time
+import tokenize
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+from file_walker import read_text_limited, walk_files
+from result_cache import DEFAULT_CACHE_DIR
+from submission_batch import discover_submissions
+
+
+DEFAULT_INDEX_PATH = os.path.join(DEFAULT_CACHE_DIR, "similarity-index.json")
+INDEX_VERSION = 2
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands of 4 rows: pairs above ~0.5 similarity are almost always candidates
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 20  # smaller files are mostly boilerplate and are not indexed
+DEFAULT_THRESHOLD = 0.8
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+SKIP_TOKENS = {
+    tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.INDENT,
+    tokenize.DEDENT, tokenize.ENCODING, tokenize.ENDMARKER
+}
+STRING_TOKENS = {tokenize.STRING, getattr(tokenize, "FSTRING_MIDDLE", tokenize.STRING)}
+KEPT_NAMES = set(keyword.kwlist) | set(dir(builtins))
+
+
+def normalize_tokens(source: str) -> List[str]:
+    """Token stream with identifiers, numbers and strings replaced by placeholders."""
+    tokens = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type in SKIP_TOKENS:
+                continue
+            if tok.type == tokenize.NAME:
+                tokens.append(tok.string if tok.string in KEPT_NAMES else "ID")
+            elif tok.type == tokenize.NUMBER:
+                tokens.append("NUM")
+            elif tok.type in STRING_TOKENS:
+                tokens.append("STR")
+            else:
+                tokens.append(tok.string)
+    except (tokenize.TokenError, SyntaxError):
+        # Keep whatever was tokenized before the error
+        pass
+    return tokens
+
+
+def shingle_hashes(tokens: List[str], size: int = SHINGLE_SIZE) -> Set[int]:
+    """64-bit hashes of every run of `size` consecutive tokens."""
+    hashes = set()
+    for i in range(len(tokens) - size + 1):
+        shingle = " ".join(tokens[i:i + size]).encode('utf-8')
+        hashes.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), 'little'))
+    return hashes
+
+
+@dataclass
+class SimilarPair:
+    """Two files whose estimated similarity is above the reporting threshold."""
+    first: str
+    second: str
+    similarity: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SimilarityIndex:
+    """MinHash signatures of cohort files, bucketed with LSH for fast pair lookup."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+
+    def signature(self, hashes: Set[int]) -> List[int]:
+        """MinHash signature of a set of shingle hashes."""
+        return [
+            min((a * h + b) % MERSENNE_PRIME for h in hashes)
+            for a, b in self.permutations
+        ]
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, tuple(signature[start:start + self.rows])
+
+    def _link(self, doc_id: str):
+        signature = self.documents[doc_id]["signature"]
+        if signature is None:  # Stub: too small to index, never bucketed
+            return
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id: str):
+        """Drop a file from the index."""
+        document = self.documents.pop(doc_id, None)
+        if document is None or document["signature"] is None:
+            return
+        for key in self._band_keys(document["signature"]):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def is_current(self, doc_id: str, size: int, mtime_ns: int) -> bool:
+        """Whether the indexed copy of a file matches its size and mtime."""
+        document = self.documents.get(doc_id)
+        return document is not None and document["size"] == size and document["mtime_ns"] == mtime_ns
+
+    def add(self, doc_id: str, source: str, owner: str, size: int = 0, mtime_ns: int = 0) -> bool:
+        """Index a file's source, replacing any previous version.
+
+        Returns False when the file is too small to be indexed; it is then
+        kept as a stub so an unchanged copy is not read again.
+        """
+        self.remove(doc_id)
+        hashes = shingle_hashes(normalize_tokens(source))
+        indexed = len(hashes) >= MIN_SHINGLES
+
+        self.documents[doc_id] = {
+            "owner": owner,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "signature": self.signature(hashes) if indexed else None
+        }
+        self._link(doc_id)
+        return indexed
+
+    def similarity(self, first: str, second: str) -> float:
+        """Estimated Jaccard similarity of two indexed files."""
+        a = self.documents[first]["signature"]
+        b = self.documents[second]["signature"]
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_perm
+
+    def near_duplicates(self, threshold: float = DEFAULT_THRESHOLD,
+                        include_same_owner: bool = False) -> List[SimilarPair]:
+        """Pairs of files at or above threshold, most similar first.
+
+        Only files sharing at least one LSH bucket are compared.
+        """
+        candidates = set()
+        for bucket in self.buckets.values():
+            if len(bucket) < 2:
+                continue
+            members = sorted(bucket)
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    candidates.add((first, second))
+
+        pairs = []
+        for first, second in candidates:
+            if not include_same_owner and self.documents[first]["owner"] == self.documents[second]["owner"]:
+                continue
+            score = self.similarity(first, second)
+            if score >= threshold:
+                pairs.append(SimilarPair(first, second, round(score, 3)))
+
+        return sorted(pairs, key=lambda p: (-p.similarity, p.first, p.second))
+
+    def save(self, path: str):
+        """Write the index to disk atomically."""
+        data = {
+            "version": INDEX_VERSION,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "seed": self.seed,
+            "shingle_size": SHINGLE_SIZE,
+            "documents": self.documents
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        """Load an index from disk, or start an empty one if it is missing or outdated."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+
+        if data.get("version") != INDEX_VERSION or data.get("shingle_size") != SHINGLE_SIZE:
+            return cls()
+
+        index = cls(data["num_perm"], data["bands"], data["seed"])
+        index.documents = data["documents"]
+        for doc_id in index.documents:
+            index._link(doc_id)
+        return index
+
+
+def update_index(index: SimilarityIndex, root: str) -> Dict[str, int]:
+    """Bring the index up to date with every submission under root."""
+    stats = {"files": 0, "indexed": 0, "unchanged": 0, "removed": 0}
+    seen = set()
+
+    for submission in discover_submissions(root):
+        submission_rel = os.path.relpath(submission, root).replace(os.sep, "/")
+        owner = submission_rel.split("/")[0] if "/" in submission_rel else Path(root).name
+
+        for entry in walk_files(str(submission)):
+            if not entry.relpath.endswith(".py"):
+                continue
+            doc_id = f"{submission_rel}/{entry.relpath}"
+            seen.add(doc_id)
+            stats["files"] += 1
+
+            if index.is_current(doc_id, entry.size, entry.mtime_ns):
+                stats["unchanged"] += 1
+                continue
+            try:
+                source, _ = read_text_limited(entry.path)
+            except (OSError, UnicodeDecodeError):
+                index.remove(doc_id)
+                continue
+            if index.add(doc_id, source, owner, entry.size, entry.mtime_ns):
+                stats["indexed"] += 1
+
+    for doc_id in [doc_id for doc_id in index.documents if doc_id not in seen]:
+        index.remove(doc_id)
+        stats["removed"] += 1
+
+    return stats
+
+
+def main():
+    """Main function to build the similarity index and report near-duplicates."""
+    parser = argparse.ArgumentParser(description="Report near-duplicate code across the cohort")
+    parser.add_argument("root", nargs="?", default="student-submissions",
+                        help="Directory containing student submissions")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH,
+                        help=f"Persisted similarity index (default: {DEFAULT_INDEX_PATH})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum estimated similarity to report (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--include-same-student", action="store_true",
+                        help="Also report pairs of files by the same student")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Ignore the persisted index and rebuild it from scratch")
+    parser.add_argument("--output", "-o", help="Write the report to a JSON file")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: Directory not found: {args.root}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    index = SimilarityIndex() if args.rebuild else SimilarityIndex.load(args.index)
+    stats = update_index(index, args.root)
+    index.save(args.index)
+    pairs = index.near_duplicates(args.threshold, args.include_same_student)
+    elapsed = time.perf_counter() - start
+
+    print(f"🔎 Indexed {stats['files']} Python files "
+          f"({stats['indexed']} updated, {stats['unchanged']} unchanged, {stats['removed']} removed) "
+          f"in {elapsed:.2f}s")
+
+    if pairs:
+        print(f"\n⚠️ {len(pairs)} near-duplicate pairs at or above {args.threshold:.0%} similarity:")
+        for pair in pairs:
+            print(f"  • {pair.similarity:.0%}  {pair.first}  ↔  {pair.second}")
+    else:
+        print(f"\n✅ No near-duplicate pairs at or above {args.threshold:.0%} similarity")
+
+    if args.output:
+        report = {
+            "threshold": args.threshold,
+            "index": stats,
+            "elapsed_seconds": round(elapsed, 3),
+            "pairs": [pair.to_dict() for pair in pairs]
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
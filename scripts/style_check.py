@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+In-Process Style Checker
+
+Runs the pycodestyle checks behind flake8's E/W codes inside the grading
+process. The style guide and its registered checks are built once per
+process and reused for every submission, and each violation is returned
+as a structured record instead of scraped command output.
+"""
+
+import io
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import pycodestyle
+except ImportError:
+    pycodestyle = None
+
+
+MAX_LINE_LENGTH = 88
+SELECT = ("E", "W")
+
+
+@dataclass
+class StyleViolation:
+    """A single style problem reported for a file."""
+    path: str
+    line: int
+    column: int
+    code: str
+    text: str
+
+    def __str__(self) -> str:
+        # Same layout as flake8's default output
+        return f"{self.path}:{self.line}:{self.column}: {self.code} {self.text}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+if pycodestyle is not None:
+    class _CollectingReport(pycodestyle.BaseReport):
+        """pycodestyle report that keeps every violation instead of printing it."""
+
+        def __init__(self, options):
+            super().__init__(options)
+            self.violations: List[StyleViolation] = []
+
+        def error(self, line_number, offset, text, check):
+            code = super().error(line_number, offset, text, check)
+            if code:
+                self.violations.append(
+                    StyleViolation(self.filename, line_number, offset + 1, code, text[5:])
+                )
+            return code
+
+
+class StyleChecker:
+    """Long-lived pycodestyle engine shared by every submission in a process."""
+
+    def __init__(self, max_line_length: int = MAX_LINE_LENGTH, select: Sequence[str] = SELECT):
+        if pycodestyle is None:
+            raise ImportError("pycodestyle is not installed. Run: pip install flake8")
+        self.style_guide = pycodestyle.StyleGuide(
+            max_line_length=max_line_length,
+            select=list(select),
+            reporter=_CollectingReport,
+            quiet=True
+        )
+
+    def check_paths(self, paths: Sequence[str]) -> List[StyleViolation]:
+        """Check files or directories and return every violation found."""
+        report = self.style_guide.init_report()
+        self.style_guide.check_files(list(paths))
+        return sorted(report.violations, key=lambda v: (v.path, v.line, v.column))
+
+    def check_sources(self, sources: Dict[str, str]) -> List[StyleViolation]:
+        """Check sources that were already read, keyed by the path to report."""
+        report = self.style_guide.init_report()
+        for path in sorted(sources):
+            # Universal newlines, as pycodestyle uses when reading files itself
+            lines = io.StringIO(sources[path], newline=None).readlines()
+            self.style_guide.input_file(path, lines=lines)
+        return sorted(report.violations, key=lambda v: (v.path, v.line, v.column))
+
+
+_STYLE_CHECKER: Optional[StyleChecker] = None
+
+
+def get_style_checker() -> StyleChecker:
+    """Return this process's style checker, building it on first use."""
+    global _STYLE_CHECKER
+    if _STYLE_CHECKER is None:
+        _STYLE_CHECKER = StyleChecker()
+    return _STYLE_CHECKER
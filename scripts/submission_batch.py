@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Batch Submission Runner
+
+Helpers for discovering every student submission in the repository (or
+only those changed between two commits), fanning a per-submission job out
+over a pool of worker processes, and keeping a persisted cohort report.
+"""
+
+import json
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+WEEK_DIR_PATTERN = re.compile(r"^week-\d+$")
+
+
+def discover_submissions(root: str) -> List[Path]:
+    """Find every `<username>/week-XX` submission directory under root."""
+    root_path = Path(root)
+    if not root_path.is_dir():
+        return []
+
+    # Allow pointing directly at a single submission
+    if WEEK_DIR_PATTERN.match(root_path.name):
+        return [root_path]
+
+    submissions = []
+    for child in sorted(root_path.iterdir()):
+        if not child.is_dir() or child.name.startswith('.'):
+            continue
+
+        # Root is a single student's directory
+        if WEEK_DIR_PATTERN.match(child.name):
+            submissions.append(child)
+            continue
+
+        for week_dir in sorted(child.iterdir()):
+            if week_dir.is_dir() and WEEK_DIR_PATTERN.match(week_dir.name):
+                submissions.append(week_dir)
+
+    return submissions
+
+
+def _git(args: List[str], cwd: str) -> str:
+    result = subprocess.run(["git"] + args, cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git {' '.join(args)} failed")
+    return result.stdout
+
+
+def changed_submissions(root: str, base: str, head: str = "HEAD") -> Tuple[List[Path], List[Path]]:
+    """Submissions under root touched between two commits.
+
+    Returns (changed, removed): directories that still exist and should be
+    re-graded, and directories that no longer exist in the working tree.
+    """
+    root_path = Path(root)
+    search_dir = str(root_path if root_path.is_dir() else Path.cwd())
+    toplevel = Path(_git(["rev-parse", "--show-toplevel"], search_dir).strip())
+    root_rel = os.path.relpath(root_path.resolve(), toplevel).replace(os.sep, "/")
+    prefix = "" if root_rel == "." else f"{root_rel}/"
+
+    output = _git(["diff-tree", "-r", "--name-only", "-z", "--no-commit-id",
+                   base, head, "--", root_rel], str(toplevel))
+
+    submissions = set()
+    for changed_path in filter(None, output.split("\0")):
+        if not changed_path.startswith(prefix):
+            continue
+        parts = changed_path[len(prefix):].split("/")
+        # <username>/week-XX/<file>, or week-XX/<file> when root is a student directory
+        if len(parts) >= 3 and WEEK_DIR_PATTERN.match(parts[1]):
+            submissions.add(root_path / parts[0] / parts[1])
+        elif len(parts) >= 2 and WEEK_DIR_PATTERN.match(parts[0]):
+            submissions.add(root_path / parts[0])
+
+    changed = sorted(path for path in submissions if path.is_dir())
+    removed = sorted(path for path in submissions if not path.is_dir())
+    return changed, removed
+
+
+def merge_cohort_report(report_path: str, batch: Dict[str, Any],
+                        removed: Optional[List[Path]] = None) -> Dict[str, Any]:
+    """Merge a batch into the persisted cohort report and return the merged report.
+
+    Results are keyed by submission path; re-graded submissions replace
+    their previous entry and removed submissions are dropped. Only a
+    missing report counts as empty: one that cannot be read or parsed
+    raises ValueError and is left untouched, since overwriting it would
+    lose every earlier result. The elapsed time and rate in the merged
+    summary describe this run's re-graded submissions.
+    """
+    existing: Dict[str, Dict[str, Any]] = {}
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            for result in json.load(f).get("submissions", []):
+                existing[result["submission"]] = result
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, AttributeError, KeyError, TypeError) as e:
+        raise ValueError(f"Cannot read cohort report {report_path} ({e}); "
+                         "fix or move it aside to start a new one") from e
+
+    for path in removed or []:
+        existing.pop(str(path), None)
+    for result in batch["submissions"]:
+        existing[result["submission"]] = result
+
+    submissions = [existing[key] for key in sorted(existing)]
+    summary = summarize_batch(submissions, batch["summary"]["elapsed_seconds"])
+    # Only this run's submissions were graded in the elapsed time
+    summary["submissions_per_second"] = batch["summary"]["submissions_per_second"]
+    summary["regraded"] = len(batch["submissions"])
+    summary["removed"] = len(removed or [])
+    merged = {"summary": summary, "submissions": submissions}
+
+    Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{report_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2)
+    os.replace(tmp_path, report_path)
+    return merged
+
+
+def default_workers() -> int:
+    """Number of worker processes to use when none is configured."""
+    return os.cpu_count() or 1
+
+
+def run_batch(job: Callable[[str], Dict[str, Any]], paths: List[Path],
+              workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Run job(path) for every submission and return results in input order.
+
+    The job must be a module-level function so it can be sent to the
+    worker processes.
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or len(paths) <= 1:
+        return [job(str(path)) for path in paths]
+
+    results: List[Dict[str, Any]] = [{} for _ in paths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        futures = {pool.submit(job, str(path)): index for index, path in enumerate(paths)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = {
+                    "submission": str(paths[index]),
+                    "passed": False,
+                    "errors": [f"Batch worker failed: {e}"],
+                    "warnings": []
+                }
+
+    return results
+
+
+def summarize_batch(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Build the aggregate summary for a batch run."""
+    passed = sum(1 for result in results if result.get("passed"))
+    elapsed = elapsed or 0.0
+    return {
+        "total_submissions": len(results),
+        "passed": passed,
+        "failed": len(results) - passed,
+        "elapsed_seconds": round(elapsed, 3),
+        "submissions_per_second": round(len(results) / elapsed, 2) if elapsed > 0 else None
+    }
+
+
+def write_batch_report(results: List[Dict[str, Any]], summary: Dict[str, Any], output: str):
+    """Write a batch report as JSON, or as one line per submission for `.jsonl`."""
+    with open(output, 'w', encoding='utf-8') as f:
+        if output.endswith('.jsonl'):
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+        else:
+            json.dump({"summary": summary, "submissions": results}, f, indent=2)
+
+
+def timed_batch(job: Callable[[str], Dict[str, Any]], paths: List[Path],
+                workers: Optional[int] = None) -> Dict[str, Any]:
+    """Run a batch and return its results together with the summary."""
+    start = time.perf_counter()
+    results = run_batch(job, paths, workers)
+    summary = summarize_batch(results, time.perf_counter() - start)
+    return {"summary": summary, "submissions": results}
@@ -7,21 +7,50 @@ This script runs automated tests on student submissions to verify functionality.
 
 import os
 import sys
-import json
-import subprocess
-import importlib.util
 from pathlib import Path
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 import argparse
 import tempfile
 import shutil
 
+from code_analysis import analyze_submission
+from env_cache import DEFAULT_ENV_DIR, DEFAULT_MAX_BYTES, DEFAULT_WHEELHOUSE, EnvironmentCache
+from instrumentation import Instrumentation, profile_call, profile_path_for
+from report_rendering import format_for_path, render_report
+from result_cache import DEFAULT_CACHE_DIR, ResultCache
+from result_schema import from_test_report, new_run_id
+from result_store import DEFAULT_STORE_PATH, store_results
+from sandbox import DEFAULT_TIMEOUT, SandboxJob, SandboxPool, get_sandbox_pool
+from staging import STAGE_MODES, stage_submission
+
+
+# Bump whenever a test changes so cached results are invalidated
+TESTER_VERSION = "3"
+
+
+def cache_version(timeout: float, stage_mode: str, wheelhouse: Optional[str]) -> str:
+    """Cache version for a tester run; results depend on these settings too."""
+    return f"{TESTER_VERSION}:timeout={timeout}:stage={stage_mode}:wheelhouse={wheelhouse or ''}"
+
 
 class SubmissionTester:
     """Run automated tests on student submissions."""
     
-    def __init__(self, submission_path: str):
+    def __init__(self, submission_path: str, cache: Optional[ResultCache] = None,
+                 sandbox: Optional[SandboxPool] = None,
+                 env_cache: Optional[EnvironmentCache] = None, stage_mode: str = "auto",
+                 timeout: float = DEFAULT_TIMEOUT):
         self.submission_path = Path(submission_path)
+        self.cache = cache
+        self.sandbox = sandbox
+        self.env_cache = env_cache or EnvironmentCache()
+        self.environment = None
+        self.stage_mode = stage_mode
+        self.timeout = timeout
+        self.instrumentation = Instrumentation()
+        self.staging = None
+        # Set when a result depends on this run (timeouts, failed installs), not on the code
+        self.transient = False
         self.test_results = []
         self.passed = True
     
@@ -33,66 +62,95 @@ class SubmissionTester:
         self.test_dir = tempfile.mkdtemp()
         print(f"Test directory: {self.test_dir}")
         
-        # Copy submission files to test directory
+        # Stage submission files into the test directory (reflink/hardlink/copy)
         try:
-            for item in self.submission_path.iterdir():
-                if item.is_file():
-                    shutil.copy2(item, self.test_dir)
-                elif item.is_dir():
-                    shutil.copytree(item, self.test_dir / item.name)
+            self.staging = stage_submission(self.submission_path, Path(self.test_dir), self.stage_mode)
         except Exception as e:
-            print(f"Error copying files: {e}")
+            print(f"Error staging files: {e}")
             return False
         
+        print(f"Staged {self.staging['files']} files in {self.staging['seconds']}s "
+              f"({self.staging['reflinked']} reflinked, {self.staging['hardlinked']} hardlinked, "
+              f"{self.staging['copied']} copied)")
+        if self.staging["link_fallbacks"]:
+            print(f"Warning: {self.staging['link_fallbacks']} file(s) were copied instead of hardlinked: "
+                  "hardlinks need read-only (0444) files and a non-root user")
         return True
     
     def install_dependencies(self) -> bool:
-        """Install dependencies from requirements.txt."""
+        """Install dependencies from requirements.txt into a shared cached environment."""
         print("📦 Installing dependencies...")
         
         req_file = Path(self.test_dir) / "requirements.txt"
         if req_file.exists():
             try:
-                result = subprocess.run(
-                    [sys.executable, "-m", "pip", "install", "-r", str(req_file)],
-                    capture_output=True,
-                    text=True,
-                    cwd=self.test_dir
-                )
-                
-                if result.returncode != 0:
-                    print(f"Warning: pip install failed: {result.stderr}")
-                    return False
+                self.environment = self.env_cache.get_or_create(str(req_file))
                 
-                print("Dependencies installed successfully")
+                if self.environment is None:
+                    print("requirements.txt lists no packages, skipping dependency installation")
+                elif self.environment.reused:
+                    print(f"♻️  Reusing cached environment: {self.environment.key}")
+                else:
+                    print(f"Dependencies installed successfully ({self.environment.build_seconds}s)")
                 return True
             except Exception as e:
-                print(f"Error installing dependencies: {e}")
+                print(f"Warning: pip install failed: {e}")
                 return False
         else:
             print("No requirements.txt found, skipping dependency installation")
             return True
     
+    def dependency_paths(self) -> List[str]:
+        """Extra import paths for the submission's cached dependencies."""
+        return [self.environment.site_packages] if self.environment else []
+    
     def test_python_imports(self) -> Dict[str, Any]:
         """Test if Python files can be imported without errors."""
         print("🔍 Testing Python imports...")
         
-        results = {"passed": True, "errors": [], "files_tested": []}
+        results = {"passed": True, "errors": [], "files_tested": [], "imports": []}
         
-        python_files = list(Path(self.test_dir).glob("*.py"))
-        for py_file in python_files:
-            try:
-                # Try to import the module
-                spec = importlib.util.spec_from_file_location(py_file.stem, py_file)
-                if spec and spec.loader:
-                    module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(module)
-                    results["files_tested"].append(str(py_file.name))
-                    print(f"✅ Successfully imported: {py_file.name}")
-            except Exception as e:
-                results["errors"].append(f"Import error in {py_file.name}: {e}")
-                results["passed"] = False
-                print(f"❌ Import failed: {py_file.name} - {e}")
+        # Import each module in its own sandboxed process, so slow or
+        # memory-hungry code cannot block or bloat the grader
+        python_files = sorted(Path(self.test_dir).glob("*.py"))
+        jobs = [
+            SandboxJob(script=str(py_file), cwd=self.test_dir, run_name=py_file.stem,
+                       timeout=self.timeout, extra_paths=self.dependency_paths())
+            for py_file in python_files
+        ]
+        if not jobs:
+            return results
+        
+        try:
+            sandbox_results = (self.sandbox or get_sandbox_pool()).run_many(jobs)
+        except Exception as e:
+            results["errors"].append(f"Error starting sandbox: {e}")
+            results["passed"] = False
+            return results
+        
+        for result in sandbox_results:
+            name = Path(result.script).name
+            results["imports"].append({
+                "file": name,
+                "passed": result.passed,
+                "import_seconds": result.exec_seconds,
+                "peak_rss_kb": result.peak_rss_kb
+            })
+            
+            if result.passed:
+                results["files_tested"].append(name)
+                print(f"✅ Successfully imported: {name}")
+                continue
+            
+            if result.timed_out:
+                self.transient = True
+                error = "timed out"
+            else:
+                stderr_lines = result.stderr.strip().splitlines()
+                error = stderr_lines[-1] if stderr_lines else f"exit code {result.returncode}"
+            results["errors"].append(f"Import error in {name}: {error}")
+            results["passed"] = False
+            print(f"❌ Import failed: {name} - {error}")
         
         return results
     
@@ -100,50 +158,66 @@ class SubmissionTester:
         """Test basic functionality of the submission."""
         print("🧪 Testing basic functionality...")
         
-        results = {"passed": True, "errors": [], "tests_run": 0}
+        results = {"passed": True, "errors": [], "tests_run": 0, "runs": []}
         
         # Look for main functions or entry points
-        python_files = list(Path(self.test_dir).glob("*.py"))
+        jobs = []
+        for summary in analyze_submission(self.test_dir):
+            if summary.read_error:
+                results["errors"].append(f"Error reading {summary.name}: {summary.read_error}")
+                results["passed"] = False
+                continue
+            if summary.too_large:
+                results["warnings"] = results.get("warnings", [])
+                results["warnings"].append(summary.too_large_warning)
+                continue
+            
+            # A script that does not parse cannot run, main guard or not
+            if summary.syntax_error:
+                results["tests_run"] += 1
+                results["errors"].append(f"Syntax error in {summary.name}: {summary.syntax_error}")
+                results["passed"] = False
+                print(f"❌ {summary.name} failed to parse: {summary.syntax_error}")
+                continue
+            
+            # Test if file has a main function
+            if summary.has_main_guard:
+                jobs.append(SandboxJob(script=summary.path, cwd=self.test_dir, timeout=self.timeout,
+                                       extra_paths=self.dependency_paths()))
         
-        for py_file in python_files:
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Test if file has a main function
-                if 'if __name__ == "__main__":' in content:
-                    results["tests_run"] += 1
-                    
-                    # Try to run the file with a timeout
-                    try:
-                        result = subprocess.run(
-                            [sys.executable, str(py_file)],
-                            capture_output=True,
-                            text=True,
-                            timeout=30,  # 30 second timeout
-                            cwd=self.test_dir
-                        )
-                        
-                        if result.returncode == 0:
-                            print(f"✅ {py_file.name} ran successfully")
-                        else:
-                            results["errors"].append(f"Runtime error in {py_file.name}: {result.stderr}")
-                            results["passed"] = False
-                            print(f"❌ {py_file.name} failed to run: {result.stderr}")
-                    
-                    except subprocess.TimeoutExpired:
-                        results["errors"].append(f"Timeout running {py_file.name}")
-                        results["passed"] = False
-                        print(f"⏰ {py_file.name} timed out")
-                    
-                    except Exception as e:
-                        results["errors"].append(f"Error running {py_file.name}: {e}")
-                        results["passed"] = False
-                        print(f"❌ Error running {py_file.name}: {e}")
+        if not jobs:
+            return results
+        
+        # Run the entry points in sandboxed workers with time and memory limits
+        try:
+            sandbox_results = (self.sandbox or get_sandbox_pool()).run_many(jobs)
+        except Exception as e:
+            results["errors"].append(f"Error starting sandbox: {e}")
+            results["passed"] = False
+            return results
+        
+        for result in sandbox_results:
+            name = Path(result.script).name
+            results["tests_run"] += 1
+            results["runs"].append({
+                "file": name,
+                "returncode": result.returncode,
+                "timed_out": result.timed_out,
+                "duration": result.duration,
+                "peak_rss_kb": result.peak_rss_kb
+            })
             
-            except Exception as e:
-                results["errors"].append(f"Error reading {py_file.name}: {e}")
+            if result.timed_out:
+                self.transient = True
+                results["errors"].append(f"Timeout running {name}")
+                results["passed"] = False
+                print(f"⏰ {name} timed out")
+            elif result.returncode == 0:
+                print(f"✅ {name} ran successfully")
+            else:
+                results["errors"].append(f"Runtime error in {name}: {result.stderr}")
                 results["passed"] = False
+                print(f"❌ {name} failed to run: {result.stderr}")
         
         return results
     
@@ -159,24 +233,16 @@ class SubmissionTester:
             results["features_tested"].append("langchain_import")
             
             # Check for common LangChain components
-            python_files = list(Path(self.test_dir).glob("*.py"))
-            langchain_components = [
-                "LLMChain", "ConversationChain", "PromptTemplate",
-                "OpenAI", "ConversationBufferMemory"
-            ]
-            
-            for py_file in python_files:
-                try:
-                    with open(py_file, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    for component in langchain_components:
-                        if component in content:
-                            results["features_tested"].append(f"uses_{component.lower()}")
-                            print(f"✅ Found {component} usage in {py_file.name}")
+            for summary in analyze_submission(self.test_dir):
+                if summary.read_error:
+                    results["errors"].append(f"Error checking {summary.name}: {summary.read_error}")
+                    continue
+                if summary.too_large:
+                    continue
                 
-                except Exception as e:
-                    results["errors"].append(f"Error checking {py_file.name}: {e}")
+                for component in summary.langchain_symbols:
+                    results["features_tested"].append(f"uses_{component.lower()}")
+                    print(f"✅ Found {component} usage in {summary.name}")
             
             if not results["features_tested"]:
                 results["warnings"] = ["No LangChain components detected"]
@@ -192,35 +258,35 @@ class SubmissionTester:
         
         results = {"passed": True, "errors": [], "metrics": {}}
         
-        python_files = list(Path(self.test_dir).glob("*.py"))
+        summaries = analyze_submission(self.test_dir)
         total_lines = 0
         total_functions = 0
         total_classes = 0
         
-        for py_file in python_files:
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    lines = content.split('\n')
-                
-                total_lines += len(lines)
-                total_functions += content.count('def ')
-                total_classes += content.count('class ')
-                
-                # Basic quality checks
-                if len(lines) > 500:
-                    results["warnings"] = results.get("warnings", [])
-                    results["warnings"].append(f"Large file: {py_file.name} ({len(lines)} lines)")
-                
-                if 'TODO' in content or 'FIXME' in content:
-                    results["warnings"] = results.get("warnings", [])
-                    results["warnings"].append(f"TODOs/FIXMEs found in {py_file.name}")
+        for summary in summaries:
+            if summary.read_error:
+                results["errors"].append(f"Error analyzing {summary.name}: {summary.read_error}")
+                continue
+            if summary.too_large:
+                results["warnings"] = results.get("warnings", [])
+                results["warnings"].append(summary.too_large_warning)
+                continue
             
-            except Exception as e:
-                results["errors"].append(f"Error analyzing {py_file.name}: {e}")
+            total_lines += summary.lines
+            total_functions += len(summary.functions)
+            total_classes += len(summary.classes)
+            
+            # Basic quality checks
+            if summary.lines > 500:
+                results["warnings"] = results.get("warnings", [])
+                results["warnings"].append(f"Large file: {summary.name} ({summary.lines} lines)")
+            
+            if summary.has_todos:
+                results["warnings"] = results.get("warnings", [])
+                results["warnings"].append(f"TODOs/FIXMEs found in {summary.name}")
         
         results["metrics"] = {
-            "total_files": len(python_files),
+            "total_files": len(summaries),
             "total_lines": total_lines,
             "total_functions": total_functions,
             "total_classes": total_classes
@@ -230,6 +296,8 @@ class SubmissionTester:
     
     def cleanup(self):
         """Clean up test environment."""
+        if self.environment:
+            self.environment.release()
         try:
             shutil.rmtree(self.test_dir)
             print(f"🧹 Cleaned up test directory: {self.test_dir}")
@@ -241,28 +309,51 @@ class SubmissionTester:
         print(f"🚀 Starting submission tests for: {self.submission_path}")
         print("=" * 50)
         
+        stage = self.instrumentation.stage
+        cache_key = None
+        if self.cache and self.submission_path.is_dir():
+            with stage("cache_lookup"):
+                cache_key = self.cache.key_for(str(self.submission_path))
+                cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("♻️  Submission unchanged since last run, using cached results")
+                cached["timings"] = self.instrumentation.to_dict()
+                return cached
+        
         try:
             # Setup
-            if not self.setup_test_environment():
-                return {"passed": False, "error": "Failed to setup test environment"}
+            with stage("setup_test_environment"):
+                staged = self.setup_test_environment()
+            if not staged:
+                return {"passed": False, "error": "Failed to setup test environment",
+                        "timings": self.instrumentation.to_dict()}
             
             # Install dependencies
-            if not self.install_dependencies():
+            with stage("install_dependencies"):
+                installed = self.install_dependencies()
+            if not installed:
+                self.transient = True
                 print("Warning: Dependency installation failed, continuing with tests")
             
             # Run tests
-            test_results = {
-                "imports": self.test_python_imports(),
-                "functionality": self.test_basic_functionality(),
-                "langchain": self.test_langchain_integration(),
-                "quality": self.test_code_quality()
+            tests = {
+                "imports": self.test_python_imports,
+                "functionality": self.test_basic_functionality,
+                "langchain": self.test_langchain_integration,
+                "quality": self.test_code_quality
             }
+            test_results = {}
+            for name, test in tests.items():
+                with stage(test.__name__):
+                    test_results[name] = test()
             
             # Generate summary
             overall_passed = all(result.get("passed", True) for result in test_results.values())
             
             report = {
                 "passed": overall_passed,
+                "environment": self.environment.key if self.environment else None,
+                "staging": self.staging,
                 "test_results": test_results,
                 "summary": {
                     "total_tests": len(test_results),
@@ -271,6 +362,11 @@ class SubmissionTester:
                 }
             }
             
+            if cache_key and not self.transient:
+                self.cache.put(cache_key, report)
+            
+            # Timings describe this run only, so they are not cached
+            report["timings"] = self.instrumentation.to_dict()
             return report
         
         finally:
@@ -278,33 +374,7 @@ class SubmissionTester:
     
     def print_report(self, report: Dict[str, Any]):
         """Print a formatted test report."""
-        print("\n" + "=" * 50)
-        print("📊 TEST RESULTS REPORT")
-        print("=" * 50)
-        
-        if report["passed"]:
-            print("✅ All tests PASSED")
-        else:
-            print("❌ Some tests FAILED")
-        
-        print(f"\n📈 Summary:")
-        print(f"  • Total Tests: {report['summary']['total_tests']}")
-        print(f"  • Passed: {report['summary']['passed_tests']}")
-        print(f"  • Failed: {report['summary']['failed_tests']}")
-        
-        print(f"\n🔍 Detailed Results:")
-        
-        for test_name, result in report["test_results"].items():
-            status = "✅ PASS" if result.get("passed", True) else "❌ FAIL"
-            print(f"  • {test_name.title()}: {status}")
-            
-            if "errors" in result and result["errors"]:
-                for error in result["errors"][:3]:  # Show first 3 errors
-                    print(f"    - {error}")
-            
-            if "warnings" in result and result["warnings"]:
-                for warning in result["warnings"][:3]:  # Show first 3 warnings
-                    print(f"    ⚠️  {warning}")
+        print(render_report("test", report, "text"))
 
 
 def main():
@@ -312,21 +382,59 @@ def main():
     parser = argparse.ArgumentParser(description="Test student submission functionality")
     parser.add_argument("submission_path", help="Path to the submission directory")
     parser.add_argument("--output", "-o", help="Output file for JSON report")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached results (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-run every test even if the submission is unchanged")
+    parser.add_argument("--env-dir", default=DEFAULT_ENV_DIR,
+                        help=f"Directory for cached dependency environments (default: {DEFAULT_ENV_DIR})")
+    parser.add_argument("--wheelhouse", default=DEFAULT_WHEELHOUSE,
+                        help="Install dependencies only from this local wheel directory (offline)")
+    parser.add_argument("--env-budget-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Disk budget for cached environments before LRU eviction")
+    parser.add_argument("--stage-mode", choices=STAGE_MODES, default="auto",
+                        help="How to stage files into the test directory (default: auto); "
+                             "hardlink only links read-only (0444) files when not running as root "
+                             "and copies the rest")
+    parser.add_argument("--profile-dir", help="Run under cProfile and save the pstats file here")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"Wall-clock limit in seconds for each sandboxed run (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--store", nargs="?", const=DEFAULT_STORE_PATH, metavar="PATH",
+                        help=f"Append results to the cohort result store (default path: {DEFAULT_STORE_PATH})")
     
     args = parser.parse_args()
     
+    cache = None
+    if not args.no_cache:
+        version = cache_version(args.timeout, args.stage_mode, args.wheelhouse)
+        cache = ResultCache(args.cache_dir, namespace="test_submission", version=version)
+    
     # Run the tester
-    tester = SubmissionTester(args.submission_path)
-    report = tester.run_all_tests()
+    env_cache = EnvironmentCache(args.env_dir, wheelhouse=args.wheelhouse,
+                                 max_bytes=args.env_budget_mb * 1024 * 1024)
+    
+    tester = SubmissionTester(args.submission_path, cache=cache, env_cache=env_cache,
+                              stage_mode=args.stage_mode, timeout=args.timeout)
+    profile_path = profile_path_for(args.profile_dir, args.submission_path) if args.profile_dir else None
+    report = profile_call(tester.run_all_tests, profile_path=profile_path)
     
     # Print report
     tester.print_report(report)
+    if profile_path:
+        print(f"\n🔬 Profile saved to: {profile_path}")
+    
+    if args.store:
+        try:
+            count = store_results(args.store, [from_test_report(report, args.submission_path, new_run_id())])
+            print(f"\n🗄️  Stored {count} result in: {args.store}")
+        except Exception as e:
+            print(f"Error storing results: {e}")
     
-    # Save report if output file specified
+    # Save report if output file specified (.md/.html/.txt render the report, anything else is JSON)
     if args.output:
         try:
             with open(args.output, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2)
+                f.write(render_report("test", report, format_for_path(args.output)))
             print(f"\n📄 Test report saved to: {args.output}")
         except Exception as e:
             print(f"Error saving report: {e}")